@@ -0,0 +1,11 @@
+class ApiError(Exception):
+    """Ошибка запроса к API; превращается в JSON-ответ с кодом `status`."""
+
+    def __init__(self, status, detail=None, errors=None):
+        super().__init__(detail)
+        self.status = status
+        self.payload = {}
+        if detail:
+            self.payload['detail'] = detail
+        if errors:
+            self.payload['errors'] = errors
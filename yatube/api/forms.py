@@ -0,0 +1,11 @@
+from django import forms
+
+from posts.forms import PostForm as BasePostForm
+from posts.models import Group
+
+
+class PostForm(BasePostForm):
+    """Пост из API: группа задаётся слагом, как и в ответах."""
+    group = forms.ModelChoiceField(
+        Group.objects.all(), to_field_name='slug', required=False
+    )
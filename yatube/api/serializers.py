@@ -0,0 +1,95 @@
+"""Сериализация строк `.values()` для JSON API.
+
+Поля ответа описаны путями ORM, поэтому `?fields=` сужает и SELECT:
+выбираются только нужные колонки, а экземпляры моделей не создаются.
+"""
+from posts.models import Post
+
+from .exceptions import ApiError
+
+
+def image_url(name):
+    if not name:
+        return None
+    return Post._meta.get_field('image').storage.url(name)
+
+
+class Fields:
+    """Поля ответа и пути ORM, из которых они читаются."""
+
+    def __init__(self, paths, convert=None):
+        self.paths = paths
+        self.convert = convert or {}
+
+    def parse(self, request, extra=()):
+        """Поля из `?fields=`; без параметра — все."""
+        available = list(self.paths) + list(extra)
+        raw = request.GET.get('fields')
+        if not raw:
+            return available
+        names = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = sorted(set(names) - set(available))
+        if unknown:
+            raise ApiError(400, 'Неизвестные поля: ' + ', '.join(unknown))
+        return list(dict.fromkeys(names))
+
+    def columns(self, names, prefix=''):
+        return [
+            prefix + self.paths[name] for name in names if name in self.paths
+        ]
+
+    def serialize(self, row, names, prefix=''):
+        item = {}
+        for name in names:
+            if name not in self.paths:
+                continue
+            value = row[prefix + self.paths[name]]
+            if name in self.convert:
+                value = self.convert[name](value)
+            item[name] = value
+        return item
+
+
+POST = Fields(
+    {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'updated': 'updated',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'image_width': 'image_width',
+        'image_height': 'image_height',
+        'comment_count': 'comment_count',
+        'reaction_count': 'reaction_count',
+    },
+    convert={'image': image_url},
+)
+
+COMMENT = Fields({
+    'id': 'id',
+    'post': 'post_id',
+    'parent': 'parent_id',
+    'depth': 'depth',
+    'reply_count': 'replies',
+    'reaction_count': 'reaction_count',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+})
+
+GROUP = Fields({
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+})
+
+AUTHOR = Fields({
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'post_count': 'stats__post_count',
+    'follower_count': 'stats__follower_count',
+    'following_count': 'stats__following_count',
+})
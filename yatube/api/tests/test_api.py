@@ -0,0 +1,303 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiReadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_author')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api_group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[-1], author=cls.reader, text='Коммент'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def get(self, url, client=None, **params):
+        response = (client or self.guest_client).get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_feeds(self):
+        feeds = {
+            reverse('api:posts'): self.guest_client,
+            reverse('api:group', kwargs={'slug': self.group.slug}): (
+                self.guest_client
+            ),
+            reverse(
+                'api:profile', kwargs={'username': self.author.username}
+            ): self.guest_client,
+            reverse('api:follow_feed'): self.authorized_client,
+        }
+        for url, client in feeds.items():
+            with self.subTest(url=url):
+                results = self.get(url, client)['results']
+                self.assertEqual(
+                    [item['id'] for item in results],
+                    [post.id for post in reversed(self.posts)],
+                )
+                self.assertEqual(results[0]['author'], self.author.username)
+                self.assertEqual(results[0]['group'], self.group.slug)
+                self.assertEqual(results[0]['comment_count'], 1)
+
+    def test_cursor_pagination(self):
+        url = reverse('api:posts')
+        seen = []
+        data = self.get(url, limit=2)
+        while True:
+            seen += [item['id'] for item in data['results']]
+            if not data['next']:
+                break
+            data = self.guest_client.get(data['next']).json()
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+        self.assertIsNotNone(data['previous'])
+
+    def test_null_cursor_shows_first_page(self):
+        # {"v":[null,null],"p":1}
+        data = self.get(
+            reverse('api:posts'), cursor='eyJ2IjpbbnVsbCxudWxsXSwicCI6MX0'
+        )
+        self.assertEqual(data['results'][0]['id'], self.posts[-1].id)
+        self.assertIsNone(data['previous'])
+
+    def test_sparse_fieldsets(self):
+        data = self.get(reverse('api:posts'), fields='id,text')
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        response = self.guest_client.get(
+            reverse('api:posts'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_detail_with_comments(self):
+        post = self.posts[-1]
+        url = reverse('api:post_detail', kwargs={'post_id': post.id})
+        data = self.get(url)
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']], ['Коммент']
+        )
+        self.assertIsNone(data['comments_next'])
+        self.assertEqual(
+            set(self.get(url, fields='text')), {'text'}
+        )
+
+    @override_settings(NUM_COMMENTS=1)
+    def test_comments_are_paginated(self):
+        post = self.posts[-1]
+        Comment.objects.create(post=post, author=self.author, text='Ещё')
+        data = self.get(
+            reverse('api:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertEqual(len(data['comments']), 1)
+        data = self.guest_client.get(data['comments_next']).json()
+        self.assertEqual([item['text'] for item in data['results']], ['Ещё'])
+        self.assertIsNone(data['next'])
+
+    @override_settings(COMMENT_DEPTH=1)
+    def test_comment_threads(self):
+        post = self.posts[0]
+        root = Comment.objects.create(post=post, author=self.author, text='1')
+        reply = Comment.objects.create(
+            post=post, author=self.reader, text='1.1', parent=root
+        )
+        Comment.objects.create(
+            post=post, author=self.author, text='1.1.1', parent=reply
+        )
+        url = reverse('api:comments', kwargs={'post_id': post.id})
+        [item] = self.get(url)['results']
+        self.assertEqual(item['reply_count'], 2)
+        self.assertEqual(
+            [(row['text'], row['parent'], row['reply_count'])
+             for row in item['thread']],
+            [('1.1', root.id, 1)],
+        )
+        results = self.get(url, thread=reply.id)['results']
+        self.assertEqual([row['text'] for row in results], ['1.1.1'])
+
+    @override_settings(MAX_COMMENTS=2)
+    def test_thread_is_paginated(self):
+        post = self.posts[0]
+        root = Comment.objects.create(post=post, author=self.author, text='1')
+        for number in range(3):
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'1.{number}',
+                parent=root,
+            )
+        url = reverse('api:comments', kwargs={'post_id': post.id})
+        [item] = self.get(url)['results']
+        self.assertEqual(len(item['thread']), 2)
+        data = self.guest_client.get(item['thread_next']).json()
+        self.assertEqual([row['text'] for row in data['results']], ['1.2'])
+        self.assertIsNone(data['next'])
+        data = self.get(url, thread=root.id, limit=1)
+        self.assertEqual([row['text'] for row in data['results']], ['1.0'])
+        self.assertIsNotNone(data['next'])
+
+    def test_profile_and_group(self):
+        data = self.get(
+            reverse(
+                'api:profile', kwargs={'username': self.author.username}
+            ),
+            self.authorized_client,
+        )
+        self.assertTrue(data['following'])
+        self.assertEqual(data['author']['post_count'], 5)
+        data = self.get(reverse('api:group', kwargs={'slug': 'api_group'}))
+        self.assertEqual(data['group']['title'], self.group.title)
+
+    def test_errors_are_json(self):
+        cases = {
+            reverse('api:group', kwargs={'slug': 'missing'}): 404,
+            reverse('api:post_detail', kwargs={'post_id': 0}): 404,
+            reverse('api:follow_feed'): 401,
+        }
+        for url, status in cases.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+
+    @override_settings(NUM_POSTS=2)
+    def test_query_budget(self):
+        # Один запрос на страницу ленты, плюс шапка группы или автора.
+        budgets = [
+            (self.guest_client, reverse('api:posts'), 1),
+            (self.guest_client, reverse(
+                'api:group', kwargs={'slug': self.group.slug}
+            ), 2),
+            (self.guest_client, reverse(
+                'api:profile', kwargs={'username': self.author.username}
+            ), 2),
+            (self.guest_client, reverse(
+                'api:post_detail', kwargs={'post_id': self.posts[-1].id}
+            ), 2),
+            (self.authorized_client, reverse('api:follow_feed'), 3),
+        ]
+        for client, url, queries in budgets:
+            with self.subTest(url=url):
+                client.get(url)
+                with self.assertNumQueries(queries):
+                    client.get(url)
+
+
+class ApiWriteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_writer')
+        cls.other = User.objects.create_user(username='api_other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='api_write_group', description='Описание'
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def send(self, method, url, data, client=None):
+        return getattr(client or self.authorized_client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_create_post(self):
+        response = self.send(
+            'post',
+            reverse('api:posts'),
+            {'text': 'Из приложения', 'group': self.group.slug},
+        )
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(id=response.json()['id'])
+        self.assertEqual(post.author, self.author)
+        self.assertEqual(post.group, self.group)
+
+    def test_invalid_post(self):
+        response = self.send('post', reverse('api:posts'), {'text': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_edit_post(self):
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.id})
+        response = self.send('patch', url, {'group': self.group.slug})
+        self.assertEqual(response.status_code, 200)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Пост')
+        self.assertEqual(self.post.group, self.group)
+        other_client = Client()
+        other_client.force_login(self.other)
+        response = self.send('patch', url, {'text': 'Чужое'}, other_client)
+        self.assertEqual(response.status_code, 403)
+
+    def test_comment(self):
+        response = self.send(
+            'post',
+            reverse('api:comments', kwargs={'post_id': self.post.id}),
+            {'text': 'Коммент'},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['author'], self.author.username)
+        self.assertTrue(Comment.objects.filter(post=self.post).exists())
+        response = self.send(
+            'post',
+            reverse('api:comments', kwargs={'post_id': self.post.id}),
+            {'text': 'Ответ', 'parent': response.json()['id']},
+        )
+        self.assertEqual(response.json()['depth'], 1)
+
+    @override_settings(REACTION_FLUSH_INTERVAL=0)
+    def test_reaction(self):
+        url = reverse('api:reaction', kwargs={'post_id': self.post.id})
+        self.assertEqual(self.send('post', url, {}).status_code, 201)
+        response = self.send('post', url, {'kind': 'wow'})
+        self.assertEqual(response.status_code, 200)
+        response = self.send('post', url, {'kind': '?'})
+        self.assertEqual(response.status_code, 400)
+        data = self.authorized_client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.post.id})
+        ).json()
+        self.assertEqual(data['reaction_count'], 1)
+        self.assertEqual(self.authorized_client.delete(url).status_code, 204)
+
+    def test_follow_and_unfollow(self):
+        url = reverse('api:follow', kwargs={'username': self.other.username})
+        self.assertEqual(self.authorized_client.post(url).status_code, 201)
+        self.assertEqual(self.authorized_client.post(url).status_code, 200)
+        self.assertTrue(
+            Follow.objects.filter(user=self.author, author=self.other)
+        )
+        self.assertEqual(self.authorized_client.delete(url).status_code, 204)
+        self.assertFalse(
+            Follow.objects.filter(user=self.author, author=self.other)
+        )
+
+    def test_writes_need_login(self):
+        response = self.send(
+            'post', reverse('api:posts'), {'text': 'Аноним'},
+            self.guest_client,
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Post.objects.filter(text='Аноним').exists())
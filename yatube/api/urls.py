@@ -0,0 +1,29 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts, name='posts'),
+    path('popular/', views.popular, name='popular'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/', views.comments, name='comments'
+    ),
+    path(
+        'posts/<int:post_id>/reaction/', views.reaction, name='reaction'
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/reaction/',
+        views.reaction,
+        name='comment_reaction'
+    ),
+    path('groups/<slug:slug>/', views.group, name='group'),
+    path(
+        'profiles/<str:username>/follow/', views.follow, name='follow'
+    ),
+    path('profiles/<str:username>/', views.profile, name='profile'),
+    path('follow/', views.follow_feed, name='follow_feed'),
+    path('export/<str:table>/', views.export, name='export'),
+]
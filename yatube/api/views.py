@@ -0,0 +1,380 @@
+"""JSON API: те же ленты и действия, что и в `posts.urls`.
+
+Ответы собираются из строк `.values()` без создания моделей, списки
+листаются курсором (`?cursor=`, `?limit=`), а `?fields=` оставляет в
+постах только перечисленные поля. Авторизация — сессией сайта, для
+запросов на запись нужен CSRF-токен, как и у HTML-форм. Изменить пост
+можно PATCH-запросом с JSON или POST-запросом с multipart, если
+меняется картинка. Персоналу доступна потоковая выгрузка таблиц.
+"""
+import json
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import transaction
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from posts import export as exports
+from posts import reactions
+from posts.feed import follow_source
+from posts.forms import ReplyForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.pagination import CursorPaginator
+from posts.ranking import POPULAR_ORDERING
+from posts.threads import replies, unfinished
+
+from .exceptions import ApiError
+from .forms import PostForm
+from .serializers import AUTHOR, COMMENT, GROUP, POST
+
+
+def api_view(*methods):
+    """Пропустить только `methods` и отдать ошибки в JSON."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = JsonResponse(
+                    {'detail': 'Метод не поддерживается.'}, status=405
+                )
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as error:
+                return JsonResponse(error.payload, status=error.status)
+            except Http404:
+                return JsonResponse({'detail': 'Не найдено.'}, status=404)
+        return wrapper
+    return decorator
+
+
+def _user(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация.')
+    return request.user
+
+
+def _data(request):
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(400, 'Некорректный JSON.')
+    if not isinstance(data, dict):
+        raise ApiError(400, 'Ожидается JSON-объект.')
+    return data
+
+
+def _limit(request, default=None, maximum=None):
+    try:
+        limit = int(request.GET.get('limit', default or settings.NUM_POSTS))
+    except ValueError:
+        raise ApiError(400, 'Некорректный limit.')
+    return min(max(limit, 1), maximum or settings.API_MAX_PAGE_SIZE)
+
+
+def _cursor_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def _page(request, queryset, ordering=('-pub_date', '-id'), prefix=''):
+    """Страница постов: строки выборки и ссылки на соседние страницы."""
+    names = POST.parse(request)
+    columns = set(POST.columns(names, prefix))
+    columns.update(name.lstrip('-') for name in ordering)
+    paginator = CursorPaginator(
+        queryset.values(*columns), _limit(request), ordering
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return {
+        'results': [
+            POST.serialize(row, names, prefix) for row in page.object_list
+        ],
+        'next': _cursor_url(request, paginator.next_cursor),
+        'previous': _cursor_url(request, paginator.previous_cursor),
+    }
+
+
+def _post(post_id, names=tuple(POST.paths)):
+    row = get_object_or_404(
+        Post.objects.values('id', *POST.columns(names)), id=post_id
+    )
+    return POST.serialize(row, names)
+
+
+def _comments(request, post_id, per_page):
+    """Ветки по `?order=`, `?cursor=` и ссылка на следующую порцию.
+
+    Ответы каждой ветки до `COMMENT_DEPTH` уровней лежат плоским
+    списком `thread` в порядке обхода; глубже — по `?thread=<id>`.
+    """
+    order = request.GET.get('order')
+    if order not in Comment.ORDERINGS:
+        order = 'oldest'
+    paginator = CursorPaginator(
+        _comment_rows(post_id).filter(depth=0),
+        per_page,
+        Comment.ORDERINGS[order],
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    next_url = None
+    if paginator.next_cursor:
+        next_url = '{}?{}'.format(
+            reverse('api:comments', kwargs={'post_id': post_id}),
+            urlencode({'order': order, 'cursor': paginator.next_cursor}),
+        )
+    return _threads(post_id, page.object_list), next_url
+
+
+def _comment_rows(post_id):
+    names = list(COMMENT.paths)
+    return Comment.objects.filter(post_id=post_id).values(
+        'path', *COMMENT.columns(names)
+    )
+
+
+def _thread_url(post_id, comment_id, cursor):
+    query = {'thread': comment_id}
+    if cursor:
+        query['cursor'] = cursor
+    return '{}?{}'.format(
+        reverse('api:comments', kwargs={'post_id': post_id}),
+        urlencode(query),
+    )
+
+
+def _threads(post_id, roots, limit=None, after=None):
+    """Корни со списками `thread`; `thread_next` — ссылка на ответы,
+    которые не поместились в `limit` (по умолчанию `MAX_COMMENTS`)."""
+    names = list(COMMENT.paths)
+    threads, cut = replies(
+        _comment_rows(post_id), roots, settings.COMMENT_DEPTH,
+        limit or settings.MAX_COMMENTS, after,
+    )
+    cursors = unfinished(roots, cut)
+    return [
+        dict(
+            COMMENT.serialize(root, names),
+            thread=[
+                COMMENT.serialize(row, names)
+                for row in threads.get(root['path'], [])
+            ],
+            thread_next=_thread_url(
+                post_id, root['id'], cursors[root['path']]
+            ) if root['path'] in cursors else None,
+        )
+        for root in roots
+    ]
+
+
+def _thread(request, post_id):
+    """Ответы на комментарий `?thread=`, свёрнутые в его ветке,
+    порциями по `?limit=` и `?cursor=`."""
+    try:
+        comment_id = int(request.GET['thread'])
+    except ValueError:
+        raise ApiError(400, 'Некорректный thread.')
+    root = get_object_or_404(_comment_rows(post_id), id=comment_id)
+    [item] = _threads(
+        post_id,
+        [root],
+        _limit(request, settings.MAX_COMMENTS, settings.MAX_COMMENTS),
+        request.GET.get('cursor'),
+    )
+    return item['thread'], item['thread_next']
+
+
+def _save_post(request, form):
+    if not form.is_valid():
+        raise ApiError(400, errors=form.errors.get_json_data())
+    post = form.save(commit=False)
+    post.author = request.user
+    with transaction.atomic():
+        post.save()
+    return post
+
+
+@api_view('GET', 'POST')
+def posts(request):
+    """Общая лента; POST создаёт пост."""
+    if request.method == 'GET':
+        return JsonResponse(_page(request, Post.objects.all()))
+    _user(request)
+    form = PostForm(_data(request), files=request.FILES or None)
+    post = _save_post(request, form)
+    return JsonResponse(_post(post.id), status=201)
+
+
+@api_view('GET', 'PATCH', 'POST')
+def post_detail(request, post_id):
+    """Пост с комментариями; PATCH и POST меняют его."""
+    if request.method == 'GET':
+        names = POST.parse(request, extra=('comments',))
+        item = _post(post_id, names)
+        if 'comments' in names:
+            item['comments'], item['comments_next'] = _comments(
+                request, post_id, settings.NUM_COMMENTS
+            )
+        return JsonResponse(item)
+    user = _user(request)
+    post = get_object_or_404(Post.objects.select_related('group'), id=post_id)
+    if post.author_id != user.id:
+        raise ApiError(403, 'Изменять пост может только автор.')
+    # Поля, которых нет в запросе, остаются прежними.
+    data = {
+        'text': post.text,
+        'group': post.group.slug if post.group else '',
+        **_data(request),
+    }
+    form = PostForm(data, files=request.FILES or None, instance=post)
+    _save_post(request, form)
+    return JsonResponse(_post(post_id))
+
+
+@api_view('GET', 'POST')
+def comments(request, post_id):
+    """Комментарии поста порциями; POST добавляет комментарий."""
+    if request.method == 'GET' and 'thread' in request.GET:
+        results, next_url = _thread(request, post_id)
+        return JsonResponse({'results': results, 'next': next_url})
+    if request.method == 'GET':
+        results, next_url = _comments(
+            request,
+            post_id,
+            _limit(request, settings.NUM_COMMENTS, settings.MAX_COMMENTS),
+        )
+        if not results:
+            get_object_or_404(Post.objects.only('id'), id=post_id)
+        return JsonResponse({'results': results, 'next': next_url})
+    user = _user(request)
+    get_object_or_404(Post.objects.only('id'), id=post_id)
+    form = ReplyForm(_data(request), post=post_id)
+    if not form.is_valid():
+        raise ApiError(400, errors=form.errors.get_json_data())
+    comment = form.save(commit=False)
+    comment.author = user
+    comment.post_id = post_id
+    with transaction.atomic():
+        comment.save()
+    names = list(COMMENT.paths)
+    row = Comment.objects.values(*COMMENT.columns(names)).get(id=comment.id)
+    return JsonResponse(COMMENT.serialize(row, names), status=201)
+
+
+@api_view('GET')
+def group(request, slug):
+    """Группа и её лента."""
+    names = list(GROUP.paths)
+    row = get_object_or_404(
+        Group.objects.values('id', *GROUP.columns(names)), slug=slug
+    )
+    page = _page(request, Post.objects.filter(group_id=row['id']))
+    return JsonResponse({'group': GROUP.serialize(row, names), **page})
+
+
+@api_view('GET')
+def profile(request, username):
+    """Автор, подписан ли на него читатель, и его лента."""
+    names = list(AUTHOR.paths)
+    row = get_object_or_404(
+        User.objects.values('id', *AUTHOR.columns(names)), username=username
+    )
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(
+            user=request.user, author_id=row['id']
+        ).exists()
+    )
+    page = _page(request, Post.objects.filter(author_id=row['id']))
+    return JsonResponse({
+        'author': AUTHOR.serialize(row, names),
+        'following': following,
+        **page,
+    })
+
+
+@api_view('POST', 'DELETE')
+def follow(request, username):
+    """POST подписывает на автора, DELETE отписывает."""
+    user = _user(request)
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    if request.method == 'DELETE':
+        with transaction.atomic():
+            Follow.objects.filter(user=user, author=author).delete()
+        return HttpResponse(status=204)
+    if author == user:
+        raise ApiError(400, 'Нельзя подписаться на себя.')
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(user=user, author=author)
+    return JsonResponse({'following': True}, status=201 if created else 200)
+
+
+@api_view('POST', 'DELETE')
+def reaction(request, post_id, comment_id=None):
+    """POST ставит или меняет реакцию `kind`, DELETE снимает."""
+    user = _user(request)
+    if comment_id is None:
+        target = get_object_or_404(Post.objects.only('id'), id=post_id)
+    else:
+        target = get_object_or_404(
+            Comment.objects.only('id', 'post_id'),
+            id=comment_id, post_id=post_id,
+        )
+    if request.method == 'DELETE':
+        reactions.unreact(user, target)
+        return HttpResponse(status=204)
+    kind = _data(request).get('kind', 'like')
+    if kind not in reactions.KINDS:
+        raise ApiError(400, 'Неизвестная реакция.')
+    created = reactions.react(user, target, kind)
+    return JsonResponse({'kind': kind}, status=201 if created else 200)
+
+
+@api_view('GET')
+def popular(request):
+    """Лента «Популярное»."""
+    return JsonResponse(_page(request, Post.objects.all(), POPULAR_ORDERING))
+
+
+@api_view('GET')
+def follow_feed(request):
+    """Лента подписок читателя."""
+    queryset, ordering, prefix = follow_source(_user(request))
+    return JsonResponse(_page(request, queryset, ordering, prefix))
+
+
+@api_view('GET')
+def export(request, table):
+    """Выгрузка таблицы: `?format=csv`, `?gzip=1`, `?after=<id>`."""
+    if not _user(request).is_staff:
+        raise ApiError(403, 'Выгрузка доступна только персоналу.')
+    if table not in exports.TABLES:
+        raise Http404
+    format_ = request.GET.get('format', 'ndjson')
+    if format_ not in exports.FORMATS:
+        raise ApiError(400, 'Неизвестный формат.')
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        raise ApiError(400, 'Некорректный after.')
+    gzip = request.GET.get('gzip') == '1'
+    response = StreamingHttpResponse(
+        exports.export(table, format_, after=after, gzip=gzip),
+        content_type=exports.CONTENT_TYPES[format_],
+    )
+    extension = format_ + ('.gz' if gzip else '')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}-after-{after}.{extension}"'
+    )
+    return response
@@ -0,0 +1,165 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('yatube.profiling')
+
+# Последние профили запросов для страницы /debug/profiling/.
+profiles = deque(maxlen=getattr(settings, 'PROFILING_BUFFER_SIZE', 100))
+
+_local = threading.local()
+_instrumented = False
+
+
+class RequestProfile:
+    def __init__(self, request):
+        self.method = request.method
+        self.path = request.get_full_path()
+        self.started = time.perf_counter()
+        self.queries = []
+        self.template_seconds = 0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def summary(self, status_code):
+        sql_seconds = sum(duration for _, duration in self.queries)
+        repeated = Counter(sql for sql, _ in self.queries)
+        slowest = max(self.queries, key=lambda query: query[1], default=None)
+        return {
+            'method': self.method,
+            'path': self.path,
+            'status': status_code,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'sql_ms': round(sql_seconds * 1000, 2),
+            'template_ms': round(self.template_seconds * 1000, 2),
+            'queries': len(self.queries),
+            'duplicates': sum(
+                count - 1 for count in repeated.values() if count > 1
+            ),
+            'slowest_sql': slowest and slowest[0],
+            'slowest_sql_ms': slowest and round(slowest[1] * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def _current():
+    return getattr(_local, 'profile', None)
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        profile = _current()
+        if profile is None:
+            return render(self, context)
+        # Вложенные шаблоны (include, extends) учитываются во внешнем.
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:
+                profile.template_seconds += time.perf_counter() - started
+    return wrapper
+
+
+def _counted(read, count):
+    # Некоторые бэкенды реализуют get() через get_many(): считаем
+    # только внешний вызов.
+    def wrapper(self, *args, **kwargs):
+        profile = _current()
+        if profile is None:
+            return read(self, *args, **kwargs)
+        profile.cache_depth += 1
+        try:
+            result = read(self, *args, **kwargs)
+        finally:
+            profile.cache_depth -= 1
+        if not profile.cache_depth:
+            hits, misses = count(result, *args, **kwargs)
+            profile.cache_hits += hits
+            profile.cache_misses += misses
+        return result
+    return wrapper
+
+
+def _count_get(value, key, default=None, version=None):
+    return (0, 1) if value is default else (1, 0)
+
+
+def _count_get_many(values, keys, version=None):
+    return len(values), len(keys) - len(values)
+
+
+def instrument():
+    """Один раз подменить рендер шаблонов и чтение из кэшей."""
+    global _instrumented
+    if _instrumented:
+        return
+    Template.render = _timed_render(Template.render)
+    for backend in {type(caches[alias]) for alias in settings.CACHES}:
+        backend.get = _counted(backend.get, _count_get)
+        backend.get_many = _counted(backend.get_many, _count_get_many)
+    _instrumented = True
+
+
+def server_timing(summary):
+    return ', '.join([
+        f'sql;dur={summary["sql_ms"]};desc="{summary["queries"]} queries, '
+        f'{summary["duplicates"]} duplicates"',
+        f'tpl;dur={summary["template_ms"]}',
+        f'cache;desc="{summary["cache_hits"]} hits, '
+        f'{summary["cache_misses"]} misses"',
+        f'total;dur={summary["total_ms"]}',
+    ])
+
+
+class ProfilingMiddleware:
+    """Профилирование запросов: SQL, шаблоны и кэш.
+
+    Выключенный (`PROFILING_ENABLED = False`) middleware снимает себя
+    из цепочки при старте и ничего не стоит.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrument()
+
+    def __call__(self, request):
+        profile = RequestProfile(request)
+        _local.profile = profile
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(profile)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.profile = None
+        summary = profile.summary(response.status_code)
+        response['Server-Timing'] = server_timing(summary)
+        profiles.append(summary)
+        logger.info(json.dumps(summary, ensure_ascii=False))
+        return response
@@ -0,0 +1,50 @@
+import tempfile
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import SimpleTestCase
+
+from yatube.cache_url import parse_cache_url
+
+
+class CacheUrlTests(SimpleTestCase):
+    def test_schemes(self):
+        cases = [
+            ('locmem://', {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }),
+            ('file:///var/tmp/yatube?timeout=60', {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': '/var/tmp/yatube',
+                'TIMEOUT': 60,
+            }),
+            ('db://yatube_cache', {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': 'yatube_cache',
+            }),
+            ('memcached://a:11211,b:11211', {
+                'BACKEND':
+                    'django.core.cache.backends.memcached.MemcachedCache',
+                'LOCATION': ['a:11211', 'b:11211'],
+            }),
+            ('redis://localhost:6379/1?key_prefix=yatube', {
+                'BACKEND': 'django_redis.cache.RedisCache',
+                'LOCATION': 'redis://localhost:6379/1',
+                'KEY_PREFIX': 'yatube',
+            }),
+        ]
+        for url, config in cases:
+            with self.subTest(url=url):
+                self.assertEqual(parse_cache_url(url), config)
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            parse_cache_url('mongo://localhost')
+
+    def test_file_cache_is_shared_between_workers(self):
+        with tempfile.TemporaryDirectory() as location:
+            config = parse_cache_url(f'file://{location}')
+            first = FileBasedCache(config['LOCATION'], {})
+            second = FileBasedCache(config['LOCATION'], {})
+            first.set('post_card:1', '<article></article>')
+            self.assertEqual(second.get('post_card:1'), '<article></article>')
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..middleware import profiles
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='not_staff')
+
+    def setUp(self):
+        cache.clear()
+        profiles.clear()
+
+    def test_disabled_by_default(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse(profiles)
+
+    @override_settings(PROFILING_ENABLED=True)
+    def test_request_is_profiled(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        profile = profiles[-1]
+        self.assertEqual(profile['path'], reverse('posts:index'))
+        self.assertGreaterEqual(profile['queries'], 1)
+        self.assertGreater(profile['template_ms'], 0)
+
+    @override_settings(PROFILING_ENABLED=True)
+    def test_panel_is_staff_only(self):
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.force_login(self.user)
+        response = client.get(reverse('core:profiling'))
+        self.assertEqual(response.status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(reverse('core:profiling'))
+        self.assertContains(response, reverse('posts:index'))
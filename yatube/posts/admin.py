@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment, Follow
+from .models import (
+    Comment, CommentReaction, Follow, Group, Post, PostReaction, SearchTerm,
+)
+from .search import tokenize
 
 
 @admin.register(Post)
@@ -17,7 +20,17 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        found = SearchTerm.objects.filter(
+            term__in=tokenize(search_term)
+        ).values('post')
+        return queryset.filter(pk__in=found), False
+
 
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
+admin.site.register(PostReaction)
+admin.site.register(CommentReaction)
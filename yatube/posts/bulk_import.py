@@ -0,0 +1,323 @@
+"""Массовая загрузка данных со старой платформы.
+
+Записи читаются потоком из NDJSON или CSV (можно сжатых gzip) и
+пачками по `batch_size` вставляются `bulk_create`, каждая пачка — в
+своей транзакции. Пользователи и группы ищутся по словарям в памяти,
+даты публикации сохраняются исходные. Посты и комментарии загружаются
+только со своими id — записи без id или с некорректным id
+пропускаются, — поэтому повторный запуск после обрыва пропускает уже
+загруженное. `bulk_create` не вызывает сигналы: счётчики, пути веток
+комментариев, очки популярности, ленты, поисковый индекс и ссылки на
+картинки восстанавливает `finish()`.
+"""
+import csv
+import gzip
+import io
+import json
+from itertools import islice
+
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import page_cache
+from .counters import recount_authors, recount_comments, recount_replies
+from .feed import rebuild_feeds
+from .media import recount as recount_media
+from .models import Comment, Follow, Group, Post, ThumbnailJob, User
+from .ranking import rescore
+from .search import rebuild_index
+from .suggestions import rebuild as rebuild_suggestions
+from .threads import fill_paths
+
+# В этом порядке таблицы ссылаются друг на друга.
+TABLES = ('users', 'groups', 'posts', 'comments', 'follows')
+BATCH_SIZE = 1000
+# Даты, которые `bulk_create` заполнил бы текущим временем.
+DATE_FIELDS = {Post: ('pub_date', 'updated'), Comment: ('created',)}
+
+
+def read_records(path, format_=None):
+    """Записи файла по одной; формат по умолчанию — по расширению."""
+    name = path[:-3] if path.endswith('.gz') else path
+    if format_ is None:
+        format_ = 'csv' if name.endswith('.csv') else 'ndjson'
+    opener = gzip.open if path.endswith('.gz') else io.open
+    with opener(path, 'rt', encoding='utf-8', newline='') as source:
+        if format_ == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _batches(records, size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _value(record, name):
+    # В CSV пропущенное значение — пустая строка.
+    value = record.get(name)
+    return None if value in ('', None) else value
+
+
+def _id(record, name):
+    """Целый id из записи; None, если его нет или он некорректен."""
+    try:
+        return int(_value(record, name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _known_hash(password):
+    try:
+        identify_hasher(password)
+    except ValueError:
+        return False
+    return True
+
+
+def _insert(model, objects):
+    """`bulk_create` с исходными датами.
+
+    `auto_now` и `auto_now_add` заменяют даты текущим временем при
+    вставке, поэтому даты записываются вторым запросом: `update()`
+    этих флагов не касается.
+    """
+    fields = DATE_FIELDS.get(model, ())
+    dates = [[getattr(obj, name) for name in fields] for obj in objects]
+    model.objects.bulk_create(objects, ignore_conflicts=True)
+    if not fields or not objects:
+        return
+    for obj, values in zip(objects, dates):
+        for name, value in zip(fields, values):
+            setattr(obj, name, value)
+    model.objects.bulk_update(objects, fields)
+
+
+class Importer:
+    """Загрузка таблиц; ссылки на пользователей и группы — по именам."""
+
+    models = {
+        'users': User,
+        'groups': Group,
+        'posts': Post,
+        'comments': Comment,
+        'follows': Follow,
+    }
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        # Что перестроить в лентах: подписки с id больше этого и все
+        # подписчики авторов загруженных постов.
+        self.last_follow_id = (
+            Follow.objects.aggregate(Max('id'))['id__max'] or 0
+        )
+        self.post_authors = set()
+        self.loaded = 0
+        self.skipped = 0
+
+    def _date(self, record, name):
+        value = _value(record, name)
+        if value is None:
+            return self.now
+        value = parse_datetime(value)
+        if value is None:
+            raise ValueError(f'Некорректная дата в поле {name}')
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value, timezone.utc)
+        return value
+
+    def load(self, table, records):
+        """Загрузить записи таблицы `table`; вернуть число загруженных."""
+        build = getattr(self, f'_{table}')
+        model = self.models[table]
+        loaded = 0
+        for batch in _batches(records, self.batch_size):
+            objects = build(batch)
+            self.skipped += len(batch) - len(objects)
+            with transaction.atomic():
+                _insert(model, objects)
+            if table == 'users':
+                self._remember_users(objects)
+            elif table == 'groups':
+                self._remember_groups(objects)
+            elif table == 'posts':
+                self.post_authors.update(post.author_id for post in objects)
+            loaded += len(objects)
+        self.loaded += loaded
+        return loaded
+
+    def _remember_users(self, users):
+        # SQLite не возвращает id из bulk_create.
+        self.users.update(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).values_list('username', 'id'))
+
+    def _remember_groups(self, groups):
+        self.groups.update(Group.objects.filter(
+            slug__in=[group.slug for group in groups]
+        ).values_list('slug', 'id'))
+
+    def _users(self, batch):
+        users = {}
+        for record in batch:
+            username = _value(record, 'username')
+            if username and username not in self.users:
+                user = User(
+                    username=username,
+                    email=_value(record, 'email') or '',
+                    first_name=_value(record, 'first_name') or '',
+                    last_name=_value(record, 'last_name') or '',
+                    date_joined=self._date(record, 'date_joined'),
+                )
+                # Хэши паролей переносятся как есть, если формат знаком
+                # Django; остальное паролем не становится.
+                password = _value(record, 'password')
+                if password and _known_hash(password):
+                    user.password = password
+                else:
+                    user.set_unusable_password()
+                users[username] = user
+        return list(users.values())
+
+    def _groups(self, batch):
+        groups = {}
+        for record in batch:
+            slug = _value(record, 'slug')
+            if slug and slug not in self.groups:
+                groups[slug] = Group(
+                    slug=slug,
+                    title=_value(record, 'title') or slug,
+                    description=_value(record, 'description') or '',
+                )
+        return list(groups.values())
+
+    def _posts(self, batch):
+        loaded = set(Post.objects.filter(
+            id__in={_id(record, 'id') for record in batch}
+        ).values_list('id', flat=True))
+        posts = {}
+        for record in batch:
+            post_id = _id(record, 'id')
+            author_id = self.users.get(_value(record, 'author'))
+            if post_id is None or post_id in loaded or author_id is None:
+                continue
+            pub_date = self._date(record, 'pub_date')
+            posts[post_id] = Post(
+                id=post_id,
+                author_id=author_id,
+                group_id=self.groups.get(_value(record, 'group')),
+                text=_value(record, 'text') or '',
+                pub_date=pub_date,
+                updated=(
+                    self._date(record, 'updated')
+                    if _value(record, 'updated') else pub_date
+                ),
+                image=_value(record, 'image') or '',
+            )
+        return list(posts.values())
+
+    def _comments(self, batch):
+        loaded = set(Comment.objects.filter(
+            id__in={_id(record, 'id') for record in batch}
+        ).values_list('id', flat=True))
+        post_ids = set(Post.objects.filter(
+            id__in={_id(record, 'post_id') for record in batch}
+        ).values_list('id', flat=True))
+        # Родитель загружен раньше или идёт в той же пачке.
+        parent_ids = set(Comment.objects.filter(
+            id__in={_id(record, 'parent_id') for record in batch}
+        ).values_list('id', flat=True))
+        comments = {}
+        for record in batch:
+            comment_id = _id(record, 'id')
+            author_id = self.users.get(_value(record, 'author'))
+            parent_id = _id(record, 'parent_id')
+            if (
+                comment_id is None or comment_id in loaded
+                or author_id is None
+                or _id(record, 'post_id') not in post_ids
+            ):
+                continue
+            if (
+                _value(record, 'parent_id') is not None
+                and parent_id not in parent_ids
+            ):
+                continue
+            comments[comment_id] = Comment(
+                id=comment_id,
+                post_id=_id(record, 'post_id'),
+                parent_id=parent_id,
+                author_id=author_id,
+                text=_value(record, 'text') or '',
+                created=self._date(record, 'created'),
+            )
+            parent_ids.add(comment_id)
+        return list(comments.values())
+
+    def _follows(self, batch):
+        follows = []
+        for record in batch:
+            user_id = self.users.get(_value(record, 'user'))
+            author_id = self.users.get(_value(record, 'author'))
+            if user_id is None or author_id is None or user_id == author_id:
+                continue
+            follows.append(Follow(user_id=user_id, author_id=author_id))
+        return follows
+
+
+def _reset_sequences():
+    # Посты и комментарии пришли со своими id.
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Post, Comment]
+    )
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def finish(importer=None):
+    """Сделать то, что при сохранении по одной записи делают сигналы.
+
+    С `importer` ленты перестраиваются только для того, что он загрузил,
+    без него — целиком.
+    """
+    _reset_sequences()
+    recount_authors()
+    recount_comments()
+    fill_paths()
+    recount_replies()
+    rescore(Post.objects.all())
+    if importer is None:
+        rebuild_feeds()
+    else:
+        rebuild_feeds(
+            Follow.objects.filter(id__gt=importer.last_follow_id),
+            importer.post_authors,
+        )
+    rebuild_suggestions()
+    rebuild_index(Post.objects.filter(search_terms=None))
+    recount_media()
+    ThumbnailJob.objects.bulk_create(
+        [
+            ThumbnailJob(post_id=post_id)
+            for post_id in Post.objects.exclude(image='').filter(
+                image_variants='', thumbnail_job=None
+            ).values_list('id', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    page_cache.invalidate(page_cache.ALL)
@@ -0,0 +1,88 @@
+"""Условные GET-запросы для страниц с постами.
+
+ETag собирается из того, что видно на странице: версии и счётчиков
+постов, заголовка страницы и состояния пользователя. Всё это уже есть
+в строках, выбранных одним запросом для страницы, поэтому ответ 304
+отдаётся до рендеринга шаблона. ETag слабый: токен CSRF в формах
+меняется от рендера к рендеру, хотя страница та же. Last-Modified не
+отдаётся: счётчики, реакции, подписки и порядок «Популярного» меняются
+без отметки времени, и 304 по одной дате вернул бы устаревшую страницу.
+"""
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+
+
+def post_state(post):
+    try:
+        followers = post.author.stats.follower_count
+    except ObjectDoesNotExist:
+        followers = 0
+    return (
+        post.pk,
+        post.updated.timestamp(),
+        post.comment_count,
+        post.reaction_count,
+        getattr(post, 'my_reaction', None),
+        followers,
+    )
+
+
+def author_state(author):
+    try:
+        stats = author.stats
+    except ObjectDoesNotExist:
+        return author.get_full_name(), None
+    return (
+        author.get_full_name(),
+        stats.post_count,
+        stats.follower_count,
+        stats.following_count,
+    )
+
+
+def suggestions_state(suggestions):
+    return [
+        (suggestion.author_id, suggestion.mutual,
+         author_state(suggestion.author), suggestion.author.username)
+        for suggestion in suggestions
+    ]
+
+
+def page_state(page):
+    return (
+        page.number,
+        page.has_next(),
+        [post_state(post) for post in page.object_list],
+    )
+
+
+def page_etag(request, *state):
+    user = request.user
+    raw = repr((
+        settings.RELEASE,
+        request.path,
+        user.pk,
+        user.get_username(),
+        datetime.now().year,
+        state,
+    ))
+    return 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def render_conditional(request, template_name, context, etag):
+    """`render()`, но с 304, если у клиента та же версия страницы.
+
+    Контекст можно передать функцией, чтобы не готовить его для 304.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if callable(context):
+            context = context()
+        response = render(request, template_name, context)
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,112 @@
+from django.db.models import (
+    Count, F, IntegerField, OuterRef, Q, Subquery, Value,
+)
+from django.db.models.functions import Coalesce, Concat
+
+from .models import (
+    AuthorStats, Comment, CommentReaction, Follow, Post, PostReaction, User,
+)
+
+
+def bump_author(user_id, **deltas):
+    """Сдвинуть счётчики автора одним UPDATE.
+
+    Если строки статистики ещё нет, при росте счётчика она создаётся
+    пересчётом; уменьшение для отсутствующей строки игнорируется —
+    так ведут себя каскадные удаления вместе с пользователем.
+    """
+    updated = AuthorStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated and any(delta > 0 for delta in deltas.values()):
+        recount_authors(User.objects.filter(id=user_id))
+
+
+def bump_comments(post_id, delta):
+    Post.objects.filter(id=post_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def bump_replies(comment, delta):
+    """Сдвинуть счётчики ответов у всех предков комментария."""
+    paths = comment.ancestor_paths()
+    if paths:
+        # До записи своего сегмента новый комментарий хранит путь
+        # родителя и сам попадает под фильтр.
+        Comment.objects.filter(
+            post_id=comment.post_id, path__in=paths
+        ).exclude(pk=comment.pk).update(replies=F('replies') + delta)
+
+
+def _count(queryset, field):
+    counted = queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+        field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def recount_authors(users=None):
+    """Пересчитать статистику авторов; вернуть число исправленных строк."""
+    if users is None:
+        users = User.objects.all()
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=user_id)
+         for user_id in users.values_list('id', flat=True)],
+        ignore_conflicts=True,
+    )
+    actual = {
+        'post_count': _count(Post.objects, 'author'),
+        'follower_count': _count(Follow.objects, 'author'),
+        'following_count': _count(Follow.objects, 'user'),
+    }
+    stats = AuthorStats.objects.filter(user__in=users).annotate(**{
+        f'actual_{field}': value for field, value in actual.items()
+    })
+    drifted = Q()
+    for field in actual:
+        drifted |= ~Q(**{field: F(f'actual_{field}')})
+    return stats.filter(drifted).update(**actual)
+
+
+def recount_comments(posts=None):
+    """Пересчитать `Post.comment_count`; вернуть число исправленных строк."""
+    if posts is None:
+        posts = Post.objects.all()
+    actual = _count(Comment.objects, 'post')
+    return posts.annotate(actual=actual).exclude(
+        comment_count=F('actual')
+    ).update(comment_count=actual)
+
+
+def recount_replies(comments=None):
+    """Пересчитать `Comment.replies`; вернуть число исправленных строк.
+
+    Потомки комментария — диапазон путей `(path, path + '~')` поста.
+    """
+    if comments is None:
+        comments = Comment.objects.all()
+    descendants = Comment.objects.filter(
+        post_id=OuterRef('post_id'),
+        path__gt=OuterRef('path'),
+        path__lt=Concat(OuterRef('path'), Value('~')),
+    ).order_by().values('post_id').annotate(total=Count('pk')).values('total')
+    actual = Coalesce(Subquery(descendants, output_field=IntegerField()), 0)
+    return comments.annotate(actual=actual).exclude(
+        replies=F('actual')
+    ).update(replies=actual)
+
+
+def recount_reactions():
+    """Пересчитать `reaction_count` постов и комментариев по таблицам
+    реакций; вернуть число исправленных строк."""
+    fixed = 0
+    for model, reactions, field in (
+        (Post, PostReaction.objects, 'post'),
+        (Comment, CommentReaction.objects, 'comment'),
+    ):
+        actual = _count(reactions, field)
+        fixed += model.objects.annotate(actual=actual).exclude(
+            reaction_count=F('actual')
+        ).update(reaction_count=actual)
+    return fixed
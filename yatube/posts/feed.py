@@ -0,0 +1,175 @@
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import AuthorStats, FeedEntry, Follow, Post
+from .pagination import CursorPaginator
+
+# Сколько авторов за раз обходит `rebuild_feeds` и сколько записей
+# лент уходит в одну вставку.
+REBUILD_AUTHORS = 500
+REBUILD_ENTRIES = 10000
+
+
+def is_celebrity(author_id):
+    return AuthorStats.objects.filter(
+        user_id=author_id,
+        follower_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).exists()
+
+
+def _entries(post, user_ids):
+    return [
+        FeedEntry(
+            user_id=user_id,
+            post=post,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in user_ids
+    ]
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        _entries(post, followers), ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту подписчика последние посты автора."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    )[:settings.FEED_BACKFILL_SIZE]
+    FeedEntry.objects.bulk_create(
+        [entry for post in posts for entry in _entries(post, [user_id])],
+        ignore_conflicts=True,
+    )
+
+
+def _latest_posts(author_ids):
+    """Последние `FEED_BACKFILL_SIZE` постов каждого автора одним запросом."""
+    posts = Post.objects.filter(author_id__in=author_ids).order_by(
+        'author_id', '-pub_date', '-id'
+    ).only('id', 'author_id', 'pub_date')
+    return {
+        author_id: list(islice(group, settings.FEED_BACKFILL_SIZE))
+        for author_id, group in groupby(
+            posts.iterator(), key=lambda post: post.author_id
+        )
+    }
+
+
+def rebuild_feeds(follows=None, authors=()):
+    """Заново заполнить ленты после массовой загрузки в обход сигналов.
+
+    `follows` — подписки, которым нужны последние посты автора, по
+    умолчанию все; `authors` — авторы, чьи посты нужно разложить всем
+    их подписчикам. Авторы обходятся пачками по `REBUILD_AUTHORS`: на
+    пачку — выборка постов, выборка подписок и вставки, а не запросы на
+    каждую подписку.
+    """
+    if follows is None:
+        follows = Follow.objects.all()
+    authors = set(authors)
+    author_ids = sorted(authors | set(
+        follows.order_by().values_list('author_id', flat=True).distinct()
+    ))
+    for start in range(0, len(author_ids), REBUILD_AUTHORS):
+        chunk = author_ids[start:start + REBUILD_AUTHORS]
+        celebrities = set(AuthorStats.objects.filter(
+            user_id__in=chunk,
+            follower_count__gt=settings.FEED_FANOUT_LIMIT,
+        ).values_list('user_id', flat=True))
+        chunk = [
+            author_id for author_id in chunk if author_id not in celebrities
+        ]
+        posts = _latest_posts(chunk)
+        pairs = Follow.objects.filter(
+            Q(author_id__in=[
+                author_id for author_id in chunk if author_id in authors
+            ])
+            | Q(author_id__in=chunk, id__in=follows.values('id'))
+        ).values_list('user_id', 'author_id')
+        entries = (
+            entry
+            for user_id, author_id in pairs.iterator()
+            for post in posts.get(author_id, ())
+            for entry in _entries(post, [user_id])
+        )
+        while True:
+            batch = list(islice(entries, REBUILD_ENTRIES))
+            if not batch:
+                break
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def demote(author_id):
+    """Разложить посты автора, который вернулся под предел рассылки.
+
+    Пока подписчиков было больше `FEED_FANOUT_LIMIT`, его посты в ленты
+    не попадали и подмешивались при чтении; теперь их читают из лент.
+    Отписки уменьшают счётчик по одному, поэтому граница — ровно
+    предел.
+    """
+    if AuthorStats.objects.filter(
+        user_id=author_id, follower_count=settings.FEED_FANOUT_LIMIT
+    ).exists():
+        rebuild_feeds(Follow.objects.filter(author_id=author_id))
+
+
+def prune(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def celebrities_followed_by(user):
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__follower_count__gt=settings.FEED_FANOUT_LIMIT,
+        ).values_list('author_id', flat=True)
+    )
+
+
+def follow_source(user):
+    """Выборка ленты подписок, её порядок и путь от строки к посту.
+
+    Обычно это таблица материализованных лент с индексом
+    `(user, -pub_date)`. Посты авторов с огромным числом подписчиков в
+    ленты не раскладываются и подмешиваются при чтении — тогда
+    выбираются сами посты. Курсоры обоих вариантов совместимы: ключ
+    всегда `(pub_date, id поста)`.
+    """
+    celebrities = celebrities_followed_by(user)
+    if celebrities:
+        entries = FeedEntry.objects.filter(user=user).values('post_id')
+        post_list = Post.objects.filter(
+            Q(id__in=entries) | Q(author_id__in=celebrities)
+        )
+        return post_list, ('-pub_date', '-id'), ''
+    entries = FeedEntry.objects.filter(user=user)
+    return entries, ('-pub_date', '-post_id'), 'post__'
+
+
+def follow_page(user, cursor):
+    """Страница ленты подписок."""
+    queryset, ordering, prefix = follow_source(user)
+    if not prefix:
+        return CursorPaginator(
+            queryset.for_feed(), settings.NUM_POSTS, ordering
+        ).get_page(cursor)
+    entries = queryset.select_related('post__author__stats', 'post__group')
+    page = CursorPaginator(
+        entries, settings.NUM_POSTS, ordering
+    ).get_page(cursor)
+    page.object_list = [entry.post for entry in page.object_list]
+    return page
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import normalize_upload
 from .models import Post, Comment
 
 
@@ -8,8 +10,37 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if image is False:
+            # Картинку удалили.
+            self.instance.image_width = None
+            self.instance.image_height = None
+            self.instance.image_bytes = None
+        elif isinstance(image, UploadedFile):
+            image, width, height = normalize_upload(image)
+            self.instance.image_width = width
+            self.instance.image_height = height
+            self.instance.image_bytes = image.size
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class ReplyForm(CommentForm):
+    """Комментарий или ответ на комментарий того же поста."""
+
+    class Meta(CommentForm.Meta):
+        fields = ('text', 'parent')
+        widgets = {'parent': forms.HiddenInput}
+
+    def __init__(self, *args, post=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['parent'].queryset = (
+            Comment.objects.filter(post=post) if post is not None
+            else Comment.objects.none()
+        )
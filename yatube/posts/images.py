@@ -0,0 +1,214 @@
+"""Обработка картинок постов.
+
+При загрузке картинка проверяется по заголовку, уменьшается до
+`POST_IMAGE_MAX_SIZE` и теряет EXIF. Затем воркер один раз декодирует
+её, обрезает по центру до пропорций `POST_IMAGE_RATIO` и сохраняет в
+нескольких ширинах и форматах. Список вариантов записывается в
+`Post.image_variants`, поэтому шаблонам не нужно обращаться к файловой
+системе, чтобы собрать `srcset`.
+"""
+import hashlib
+import json
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import page_cache
+
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+EXTENSIONS = {
+    'AVIF': 'avif', 'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif',
+}
+
+
+# Форматы, в которых загрузка сохраняется как есть; прочие — в JPEG.
+UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+
+def _needs_rewrite(image):
+    width, height = settings.POST_IMAGE_MAX_SIZE
+    return (
+        image.width > width or image.height > height
+        or 'exif' in image.info
+        or image.format not in UPLOAD_FORMATS
+    )
+
+
+def normalize_upload(upload):
+    """Проверить загруженную картинку и привести её к разумному размеру.
+
+    Возвращает файл для `Post.image` и его ширину и высоту. Размеры
+    берутся из заголовка, поэтому слишком большая картинка отвергается
+    до декодирования.
+    """
+    if upload.size > settings.POST_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ.',
+            code='file_too_large',
+            params={'limit': settings.POST_IMAGE_MAX_BYTES // 2 ** 20},
+        )
+    upload.seek(0)
+    image = Image.open(upload)
+    if image.width * image.height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)d×%(height)d слишком большая.',
+            code='too_many_pixels',
+            params={'width': image.width, 'height': image.height},
+        )
+    if getattr(image, 'is_animated', False) or not _needs_rewrite(image):
+        upload.seek(0)
+        return upload, image.width, image.height
+    format_ = image.format if image.format in UPLOAD_FORMATS else 'JPEG'
+    # JPEG умеет декодироваться сразу в уменьшенном масштабе.
+    image.draft('RGB', settings.POST_IMAGE_MAX_SIZE)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE, Image.LANCZOS)
+    image.info.pop('exif', None)
+    if format_ == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        format_,
+        quality=settings.POST_IMAGE_QUALITY,
+        optimize=True,
+        icc_profile=image.info.get('icc_profile'),
+    )
+    name = os.path.splitext(upload.name)[0] + '.' + EXTENSIONS.get(
+        format_, format_.lower()
+    )
+    return (
+        SimpleUploadedFile(
+            name, buffer.getvalue(), content_type=Image.MIME[format_]
+        ),
+        image.width,
+        image.height,
+    )
+
+
+def supported_formats():
+    """Форматы из настроек, которые умеет сохранять установленный Pillow.
+
+    AVIF, например, появляется только с плагином pillow-avif-plugin.
+    """
+    Image.init()
+    return [
+        format_ for format_ in settings.POST_IMAGE_FORMATS
+        if format_ in Image.SAVE
+    ]
+
+
+def _widths(source_width):
+    # Не растягиваем картинку: лишние ширины отбрасываются, но хотя бы
+    # один вариант остаётся.
+    widths = sorted(settings.POST_IMAGE_WIDTHS)
+    return [width for width in widths if width <= source_width] or widths[:1]
+
+
+def _encode(image, format_):
+    if format_ == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(buffer, format_, quality=settings.POST_IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def _save(name, content):
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(content))
+
+
+def variants_dir(source_name):
+    """Каталог вариантов: общий у всех постов с одним файлом картинки."""
+    key = hashlib.md5(source_name.encode()).hexdigest()
+    return f'variants/{key[:2]}/{key}'
+
+
+def render_variants(image_field):
+    """Нарезать варианты картинки и вернуть их описание для `Post`."""
+    ratio_width, ratio_height = settings.POST_IMAGE_RATIO
+    with image_field.open('rb') as file_:
+        image = Image.open(file_)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    # Кадр нужных пропорций в полном разрешении, из него — все ширины.
+    scale = min(image.width / ratio_width, image.height / ratio_height)
+    frame = ImageOps.fit(
+        image,
+        (round(ratio_width * scale) or 1, round(ratio_height * scale) or 1),
+        method=Image.LANCZOS,
+    )
+    directory = variants_dir(image_field.name)
+    formats = supported_formats()
+    sources = {format_: [] for format_ in formats}
+    for width in _widths(frame.width):
+        height = round(width * ratio_height / ratio_width) or 1
+        resized = frame.resize((width, height), Image.LANCZOS)
+        for format_ in formats:
+            name = _save(
+                f'{directory}/{width}.{EXTENSIONS[format_]}',
+                _encode(resized, format_),
+            )
+            sources[format_].append([width, name])
+    return {
+        'source': image_field.name,
+        'original': [image.width, image.height],
+        'width': ratio_width,
+        'height': ratio_height,
+        'sources': [
+            {'type': MIME_TYPES[format_], 'srcset': sources[format_]}
+            for format_ in formats
+        ],
+    }
+
+
+def _shared_variants(post):
+    """Варианты того же файла, уже нарезанные для другого поста."""
+    stored = type(post).objects.filter(image=post.image.name).exclude(
+        pk=post.pk
+    ).exclude(image_variants='').values_list(
+        'image_variants', flat=True
+    ).first()
+    if not stored:
+        return None
+    variants = json.loads(stored)
+    return variants if variants['source'] == post.image.name else None
+
+
+def update_variants(post):
+    """Подготовить варианты, если их нет; True, если они обновились."""
+    if not post.image or post.variants is not None:
+        return False
+    variants = _shared_variants(post) or render_variants(post.image)
+    post.image_variants = json.dumps(variants)
+    fields = {'image_variants': post.image_variants, 'updated': timezone.now()}
+    if post.image_width is None:
+        # Картинки, загруженные до проверки при загрузке.
+        post.image_width, post.image_height = variants['original']
+        post.image_bytes = post.image.size
+        fields.update(
+            image_width=post.image_width,
+            image_height=post.image_height,
+            image_bytes=post.image_bytes,
+        )
+    # Картинку могли заменить, пока нарезались варианты; новая версия
+    # поста сбрасывает закэшированную карточку.
+    posts = type(post).objects.filter(pk=post.pk, image=post.image.name)
+    page_cache.invalidate(*page_cache.tags_for(posts))
+    posts.update(**fields)
+    return True
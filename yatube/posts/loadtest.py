@@ -0,0 +1,201 @@
+"""Сценарии нагрузочного теста для запущенного сервера.
+
+Каждый виртуальный пользователь — отдельная сессия `requests`, которая
+в цикле проходит случайный сценарий: аноним листает ленты, читатель
+смотрит подписки, автор публикует пост, комментатор отвечает на пост.
+Время ответа записывается под именем URL (`posts:index`), чтобы отчёт
+совпадал с бюджетами в `posts/tests/budgets.json`.
+"""
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from django.db.models import Max
+from django.urls import Resolver404, resolve, reverse
+
+from .models import Group, Post, User
+from .synthetic import USERNAME
+
+SCENARIOS = ('anonymous', 'feed', 'posting', 'commenting')
+# Доля сценариев в смеси по умолчанию: читают намного чаще, чем пишут.
+DEFAULT_MIX = {'anonymous': 70, 'feed': 20, 'posting': 3, 'commenting': 7}
+SAMPLE_SIZE = 1000
+# Ссылка на следующую страницу ленты в cursor_paginator.html.
+NEXT_PAGE = re.compile(r'href="\?cursor=([^"]+)"')
+
+
+def percentile(values, share):
+    """Процентиль по ближайшему рангу для отсортированного списка."""
+    if not values:
+        return None
+    rank = max(math.ceil(share * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+class Targets:
+    """Случайные посты, группы и авторы, которые открывают сценарии."""
+
+    def __init__(self, username_prefix=USERNAME.format('')):
+        last_id = Post.objects.aggregate(Max('id'))['id__max'] or 0
+        ids = random.sample(range(1, last_id + 1), min(SAMPLE_SIZE, last_id))
+        self.post_ids = list(
+            Post.objects.filter(id__in=ids).values_list('id', flat=True)
+        )
+        self.slugs = list(
+            Group.objects.values_list('slug', flat=True)[:SAMPLE_SIZE]
+        )
+        self.usernames = list(User.objects.filter(
+            username__startswith=username_prefix
+        ).values_list('username', flat=True)[:SAMPLE_SIZE])
+        if not (self.post_ids and self.usernames):
+            raise ValueError(
+                'Нет данных для сценариев: запустите manage.py generate_data'
+            )
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, name, seconds, failed):
+        with self.lock:
+            self.timings[name].append(seconds)
+            if failed:
+                self.errors[name] += 1
+
+    def report(self):
+        """Строки отчёта: имя URL, число запросов, ошибки, p50/p95/p99 в мс."""
+        rows = []
+        for name, timings in sorted(self.timings.items()):
+            timings = sorted(timings)
+            rows.append((
+                name,
+                len(timings),
+                self.errors[name],
+                *(percentile(timings, share) * 1000
+                  for share in (0.5, 0.95, 0.99)),
+            ))
+        return rows
+
+
+def _url_name(path):
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return path
+    return match.view_name
+
+
+class VirtualUser:
+    def __init__(self, base_url, targets, stats, password):
+        self.base_url = base_url.rstrip('/')
+        self.targets = targets
+        self.stats = stats
+        self.password = password
+        self.session = requests.Session()
+        self.username = None
+
+    def request(self, method, path, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.request(
+                method, self.base_url + path, allow_redirects=False,
+                timeout=30, **kwargs
+            )
+            failed = response.status_code >= 400
+            return response
+        except requests.RequestException:
+            return None
+        finally:
+            self.stats.add(
+                _url_name(path), time.perf_counter() - started, failed
+            )
+
+    def post(self, path, data):
+        data = dict(data, csrfmiddlewaretoken=self.session.cookies.get(
+            'csrftoken', ''
+        ))
+        return self.request(
+            'POST', path, data=data, headers={'Referer': self.base_url}
+        )
+
+    def login(self):
+        if self.username:
+            return
+        self.username = random.choice(self.targets.usernames)
+        self.request('GET', reverse('users:login'))
+        self.post(reverse('users:login'), {
+            'username': self.username, 'password': self.password,
+        })
+
+    def anonymous(self):
+        self.session.cookies.clear()
+        self.username = None
+        index = reverse('posts:index')
+        response = self.request('GET', index)
+        cursors = NEXT_PAGE.findall(response.text) if response else []
+        if cursors:
+            self.request('GET', f'{index}?cursor={cursors[-1]}')
+        if self.targets.slugs:
+            self.request('GET', reverse('posts:group_list', kwargs={
+                'slug': random.choice(self.targets.slugs)
+            }))
+        self.request('GET', reverse('posts:profile', kwargs={
+            'username': random.choice(self.targets.usernames)
+        }))
+        self.request('GET', reverse('posts:post_detail', kwargs={
+            'post_id': random.choice(self.targets.post_ids)
+        }))
+
+    def feed(self):
+        self.login()
+        self.request('GET', reverse('posts:follow_index'))
+        self.request('GET', reverse('posts:index'))
+
+    def posting(self):
+        self.login()
+        self.request('GET', reverse('posts:post_create'))
+        self.post(reverse('posts:post_create'), {
+            'text': f'Нагрузочный пост {time.time()}',
+        })
+
+    def commenting(self):
+        self.login()
+        post_id = random.choice(self.targets.post_ids)
+        self.request('GET', reverse(
+            'posts:post_detail', kwargs={'post_id': post_id}
+        ))
+        self.post(
+            reverse('posts:add_comment', kwargs={'post_id': post_id}),
+            {'text': 'Нагрузочный комментарий'},
+        )
+
+
+def run(base_url, duration, concurrency, password, mix=None):
+    """Гонять сценарии `duration` секунд в `concurrency` потоков."""
+    mix = mix or DEFAULT_MIX
+    targets = Targets()
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    scenarios = list(mix)
+    weights = [mix[name] for name in scenarios]
+
+    def worker():
+        user = VirtualUser(base_url, targets, stats, password)
+        while time.monotonic() < deadline:
+            scenario = random.choices(scenarios, weights)[0]
+            getattr(user, scenario)()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return stats
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.media import collect_garbage, recount
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает ссылки на файлы картинок и удаляет файлы, '
+        'которые не нужны ни одному посту'
+    )
+
+    def handle(self, *args, **options):
+        fixed = recount()
+        deleted = collect_garbage()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков ссылок: {fixed}, удалено файлов: {deleted}'
+        ))
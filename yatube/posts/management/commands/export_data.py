@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.export import CHUNK_SIZE, FORMATS, TABLES, export
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты, комментарии, подписки или группы '
+        'в NDJSON или CSV'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(TABLES))
+        parser.add_argument(
+            '--format', choices=FORMATS, default='ndjson',
+            help='Формат выгрузки',
+        )
+        parser.add_argument(
+            '--after', type=int, default=0,
+            help='Продолжить после записи с этим id',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз',
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout'
+        )
+
+    def handle(self, *args, **options):
+        chunks = export(
+            options['table'],
+            options['format'],
+            after=options['after'],
+            gzip=options['gzip'],
+            chunk_size=options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            return
+        output = getattr(self.stdout, '_out', sys.stdout)
+        output = getattr(output, 'buffer', output)
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from posts.bulk_import import BATCH_SIZE, TABLES, Importer, finish
+from posts.models import Comment, Post
+from posts.synthetic import SCALES, Generator
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетический социальный граф для нагрузочного '
+        'тестирования: пользователей, группы, посты, комментарии, подписки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=sorted(SCALES), default='small',
+            help='Готовый набор объёмов; отдельные опции его уточняют',
+        )
+        for table in TABLES:
+            parser.add_argument(
+                f'--{table}', type=int, help=f'Сколько создать: {table}'
+            )
+        parser.add_argument(
+            '--images', type=float, default=0.1,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней публикуются посты',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--password',
+            help='Пароль всех пользователей, нужен для manage.py load_test',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        volume = dict(SCALES[options['scale']])
+        for table in TABLES:
+            if options[table] is not None:
+                volume[table] = options[table]
+        last_id = Post.objects.aggregate(Max('id'))['id__max'] or 0
+        last_comment_id = (
+            Comment.objects.aggregate(Max('id'))['id__max'] or 0
+        )
+        generator = Generator(
+            images=options['images'],
+            days=options['days'],
+            seed=options['seed'],
+            password=options['password'],
+            first_post_id=last_id + 1,
+            first_comment_id=last_comment_id + 1,
+            **volume,
+        )
+        if options['images']:
+            generator.prepare_images()
+        importer = Importer(options['batch_size'])
+        for table in TABLES:
+            loaded = importer.load(table, getattr(generator, table)())
+            self.stdout.write(f'{table}: создано записей {loaded}')
+        self.stdout.write('Пересчёт счётчиков, лент и индекса…')
+        finish(importer)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано записей: {importer.loaded}'
+        ))
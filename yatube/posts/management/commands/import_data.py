@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.bulk_import import (
+    BATCH_SIZE, TABLES, Importer, finish, read_records,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает пользователей, группы, посты, комментарии и подписки '
+        'из NDJSON или CSV пачками через bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sources', nargs='+', metavar='таблица=файл',
+            help=f'Таблица ({", ".join(TABLES)}) и файл .ndjson или .csv, '
+                 'возможно сжатый .gz',
+        )
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='Формат файлов, если его не видно по расширению',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько записей вставлять в одной транзакции',
+        )
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и индекс в конце',
+        )
+
+    def _sources(self, sources):
+        parsed = {}
+        for source in sources:
+            table, _, path = source.partition('=')
+            if table not in TABLES or not path:
+                raise CommandError(f'Ожидается таблица=файл: {source}')
+            parsed[table] = path
+        return sorted(parsed.items(), key=lambda item: TABLES.index(item[0]))
+
+    def handle(self, *args, **options):
+        importer = Importer(options['batch_size'])
+        for table, path in self._sources(options['sources']):
+            loaded = importer.load(
+                table, read_records(path, options['format'])
+            )
+            self.stdout.write(f'{table}: загружено записей {loaded}')
+        if not options['no_rebuild']:
+            finish(importer)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {importer.loaded}, '
+            f'пропущено: {importer.skipped}'
+        ))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.loadtest import DEFAULT_MIX, SCENARIOS, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест запущенного сервера: сценарии анонима, ленты '
+        'подписок, публикации и комментирования; p50/p95/p99 по URL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', default='http://127.0.0.1:8000',
+            help='Адрес сервера, например из manage.py runserver',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=60, help='Секунд нагрузки'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Число одновременных виртуальных пользователей',
+        )
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIOS,
+            help='Сценарий; можно повторить. По умолчанию — смесь всех',
+        )
+        parser.add_argument(
+            '--password',
+            help='Пароль пользователей из manage.py generate_data',
+        )
+
+    def handle(self, *args, **options):
+        scenarios = options['scenario'] or list(DEFAULT_MIX)
+        if set(scenarios) - {'anonymous'} and not options['password']:
+            raise CommandError('Сценариям с входом нужен --password')
+        mix = {name: DEFAULT_MIX[name] for name in scenarios}
+        try:
+            stats = run(
+                options['base_url'],
+                options['duration'],
+                options['concurrency'],
+                options['password'],
+                mix,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            f'{"URL":<24}{"запросов":>10}{"ошибок":>8}'
+            f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+        )
+        for name, count, errors, p50, p95, p99 in stats.report():
+            self.stdout.write(
+                f'{name:<24}{count:>10}{errors:>8}'
+                f'{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}'
+            )
@@ -0,0 +1,54 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.thumbnails import claim, process
+
+
+def process_in_thread(job):
+    try:
+        return process(job)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Готовит миниатюры картинок из очереди в пуле потоков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.THUMBNAIL_WORKERS,
+            help='Число потоков; при 1 задачи выполняются в текущем',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и выйти, а не ждать новых задач',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза в секундах между проверками пустой очереди',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                jobs = claim(workers * 4)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                if workers == 1:
+                    results = [process(job) for job in jobs]
+                else:
+                    results = list(pool.map(process_in_thread, jobs))
+                done += results.count(True)
+                failed += results.count(False)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово задач: {done}, с ошибкой: {failed}'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «кого почитать» по всему графу '
+        'подписок; запускается по расписанию'
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранены рекомендации: {count}'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import (
+    recount_authors, recount_comments, recount_reactions, recount_replies,
+)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики постов и подписок'
+
+    def handle(self, *args, **options):
+        authors = recount_authors()
+        posts = recount_comments()
+        comments = recount_replies()
+        reactions = recount_reactions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено строк статистики авторов: {authors}, '
+            f'счётчиков комментариев: {posts}, '
+            f'счётчиков ответов: {comments}, '
+            f'счётчиков реакций: {reactions}'
+        ))
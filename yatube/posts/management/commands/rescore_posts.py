@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import Post
+from posts.ranking import BATCH_SIZE, rescore
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает очки популярности постов; запускается '
+        'по расписанию и исправляет пропущенные события'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Только посты не старше стольких дней; по умолчанию все',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько постов обновлять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options['days'] is not None:
+            posts = posts.filter(
+                pub_date__gte=timezone.now() - timedelta(days=options['days'])
+            )
+        changed = rescore(posts, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны очки постов: {changed}'
+        ))
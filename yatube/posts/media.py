@@ -0,0 +1,125 @@
+"""Подсчёт ссылок на файлы картинок и сборка мусора.
+
+Файл в адресуемом содержимым хранилище может принадлежать нескольким
+постам. Сигналы постов держат `MediaFile.references` в актуальном
+состоянии, а файл и его варианты удаляются после коммита транзакции,
+в которой исчезла последняя ссылка. Массовые операции в обход сигналов
+исправляет `manage.py collect_media`.
+"""
+import logging
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .images import variants_dir
+from .models import MediaFile, Post
+
+logger = logging.getLogger('yatube.media')
+
+IMAGE_DIR = Post._meta.get_field('image').upload_to.rstrip('/')
+VARIANTS_DIR = 'variants'
+
+
+def acquire(name):
+    updated = MediaFile.objects.filter(name=name).update(
+        references=F('references') + 1
+    )
+    if not updated:
+        MediaFile.objects.get_or_create(name=name)
+        MediaFile.objects.filter(name=name).update(
+            references=F('references') + 1
+        )
+
+
+def release(name):
+    MediaFile.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1
+    )
+    deleted, _ = MediaFile.objects.filter(
+        name=name, references=0
+    ).delete()
+    if deleted:
+        transaction.on_commit(lambda: delete_orphan(name))
+
+
+def delete_orphan(name):
+    """Удалить файл и его варианты, если на него снова никто не ссылается."""
+    if not name.startswith(IMAGE_DIR + '/'):
+        # Путь, записанный в пост в обход хранилища.
+        return
+    if MediaFile.objects.filter(name=name).exists() or Post.objects.filter(
+        image=name
+    ).exists():
+        return
+    storage = Post._meta.get_field('image').storage
+    storage.delete(name)
+    for variant in list(_walk(default_storage, variants_dir(name))):
+        default_storage.delete(variant)
+    logger.info('Удалён файл %s', name)
+
+
+def recount():
+    """Пересчитать ссылки по таблице постов; вернуть число исправлений."""
+    counted = dict(
+        Post.objects.exclude(image='').order_by().values_list(
+            'image'
+        ).annotate(Count('id'))
+    )
+    fixed = 0
+    for media in MediaFile.objects.all():
+        references = counted.pop(media.name, 0)
+        if media.references != references:
+            media.references = references
+            media.save(update_fields=['references'])
+            fixed += 1
+    MediaFile.objects.bulk_create([
+        MediaFile(name=name, references=references)
+        for name, references in counted.items()
+    ])
+    MediaFile.objects.filter(references=0).delete()
+    return fixed + len(counted)
+
+
+def _walk(storage, path):
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for directory in directories:
+        yield from _walk(storage, os.path.join(path, directory))
+    for file_ in files:
+        yield os.path.join(path, file_)
+
+
+def _old_files(storage, path, keep, before):
+    # Свежие файлы могут принадлежать ещё не закоммиченному посту.
+    return [
+        name for name in _walk(storage, path)
+        if not keep(name) and storage.get_modified_time(name) < before
+    ]
+
+
+def collect_garbage(grace=timedelta(hours=1)):
+    """Удалить файлы и варианты, на которые не ссылается ни один пост.
+
+    Вызывать после `recount()`; вернуть число удалённых файлов.
+    """
+    before = timezone.now() - grace
+    names = set(MediaFile.objects.values_list('name', flat=True))
+    storage = Post._meta.get_field('image').storage
+    orphans = _old_files(storage, IMAGE_DIR, names.__contains__, before)
+    kept = {variants_dir(name) for name in names}
+    variants = _old_files(
+        default_storage,
+        VARIANTS_DIR,
+        lambda name: os.path.dirname(name) in kept,
+        before,
+    )
+    for name in orphans:
+        storage.delete(name)
+    for name in variants:
+        default_storage.delete(name)
+    return len(orphans) + len(variants)
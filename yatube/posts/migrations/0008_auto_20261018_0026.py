@@ -0,0 +1,45 @@
+# Generated by Django 2.2.28 on 2026-10-18 00:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import Counter
+
+
+def fill_index(apps, schema_editor):
+    from posts.search import tokenize
+
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for post in Post.objects.only('id', 'text').iterator():
+        SearchTerm.objects.bulk_create([
+            SearchTerm(post_id=post.id, term=term, weight=weight)
+            for term, weight in Counter(tokenize(post.text)).items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Термин поиска',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='search_term_post_unique'),
+        ),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
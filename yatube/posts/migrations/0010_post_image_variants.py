@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 00:32
+
+from django.db import migrations, models
+
+
+def queue_images(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    ThumbnailJob = apps.get_model('posts', 'ThumbnailJob')
+    ThumbnailJob.objects.bulk_create(
+        [
+            ThumbnailJob(post_id=post_id)
+            for post_id in Post.objects.exclude(image='').values_list(
+                'id', flat=True
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_thumbnailjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Варианты картинки'),
+        ),
+        migrations.RunPython(queue_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.28 on 2026-10-18 01:15
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_scores(apps, schema_editor):
+    # Формула posts.ranking на момент миграции; реакций ещё нет.
+    Post = apps.get_model('posts', 'Post')
+    decay = settings.POPULAR_DECAY_HOURS * 3600
+    posts = []
+    for post_id, pub_date, comments, followers in Post.objects.values_list(
+        'id', 'pub_date', 'comment_count', 'author__stats__follower_count'
+    ).iterator():
+        engagement = comments * 2 + (followers or 0) * 0.1
+        posts.append(Post(
+            id=post_id,
+            score=math.log10(1 + engagement) + pub_date.timestamp() / decay,
+        ))
+    Post.objects.bulk_update(posts, ['score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_auto_20261018_0109'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Очки популярности'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-score', '-id'], name='post_score_id_idx'),
+        ),
+    ]
@@ -1,5 +1,10 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -24,6 +29,19 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        return self.select_related('author__stats', 'group')
+
+    def with_last_comment(self):
+        """Дата последнего комментария — для валидаторов страницы поста."""
+        return self.annotate(last_comment=models.Subquery(
+            Comment.objects.filter(post=models.OuterRef('pk')).order_by(
+                '-created'
+            ).values('created')[:1]
+        ))
+
+
 class Post(models.Model):
     LEN_POST = 15
     text = models.TextField(
@@ -35,6 +53,10 @@ class Post(models.Model):
         verbose_name='Дата поста',
         help_text='Укажите дату'
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -53,22 +75,113 @@ class Post(models.Model):
         verbose_name='Картинка',
         help_text='Загрузите картинку',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        db_index=True,
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Ширина картинки',
+    )
+    image_height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Высота картинки',
+    )
+    image_bytes = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Размер картинки в байтах',
+    )
+    # JSON с адресами подготовленных вариантов картинки, см. posts.images.
+    image_variants = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Варианты картинки',
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев',
+    )
+    # Копится в памяти процесса и пишется пачками, см. posts.reactions.
+    reaction_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число реакций',
+    )
+    # Очки ленты «Популярное», см. posts.ranking.
+    score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Очки популярности',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-score', '-id'],
+                name='post_score_id_idx',
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:self.LEN_POST]
 
+    @cached_property
+    def variants(self):
+        """Варианты текущей картинки или None, если они ещё не готовы."""
+        if not self.image or not self.image_variants:
+            return None
+        variants = json.loads(self.image_variants)
+        if variants['source'] != self.image.name:
+            return None
+        return variants
+
 
 class Comment(models.Model):
+    """Комментарий; ответы образуют ветки с материализованным путём.
+
+    `path` — id всех предков и самого комментария, каждый дополнен
+    нулями до PATH_STEP знаков. Сортировка по пути выдаёт ветку в
+    порядке обхода в глубину, а вся ветка — это диапазон
+    `[path, path + '~')` одного индекса (post, path).
+    """
+    PATH_STEP = 10
+    # Ответ на комментарий этой глубины становится ему соседом.
+    MAX_DEPTH = 8
+    # Порядок веток верхнего уровня по индексу (post, depth, path).
+    ORDERINGS = {
+        'oldest': ('path',),
+        'newest': ('-path',),
+    }
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
+        # Покрывается составными индексами ниже.
+        db_index=False,
         related_name='comments',
         verbose_name='Комментируемый пост',
         help_text='Комментируемый пост'
@@ -89,12 +202,87 @@ class Comment(models.Model):
         verbose_name='Дата поста',
         help_text='Укажите дату или она добавится автоматически'
     )
+    parent = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='children',
+        verbose_name='Ответ на комментарий',
+    )
+    path = models.CharField(
+        max_length=PATH_STEP * (MAX_DEPTH + 1),
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Путь в ветке',
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Глубина',
+    )
+    replies = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число ответов в ветке',
+    )
+    reaction_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число реакций',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_id_idx',
+            ),
+            models.Index(
+                fields=['post', 'path'],
+                name='comment_post_path_idx',
+            ),
+            models.Index(
+                fields=['post', 'depth', 'path'],
+                name='comment_post_depth_path_idx',
+            ),
+        ]
+
+    @classmethod
+    def segment(cls, pk):
+        return str(pk).zfill(cls.PATH_STEP)
+
+    def ancestor_paths(self):
+        """Пути всех предков, от корня ветки до родителя."""
+        return [
+            self.path[:end] for end in range(
+                self.PATH_STEP, self.PATH_STEP * self.depth + 1,
+                self.PATH_STEP,
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is None and self.parent_id:
+            if self.parent.depth >= self.MAX_DEPTH:
+                self.parent = self.parent.parent
+            self.post_id = self.parent.post_id
+            self.depth = self.parent.depth + 1
+            # Свой сегмент пути появится только с id; сигналам
+            # достаточно путей предков.
+            self.path = self.parent.path
+        super().save(*args, **kwargs)
+        if len(self.path) < self.PATH_STEP * (self.depth + 1):
+            self.path += self.segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
 
 
 class Follow(models.Model):
+    # Оба поля покрываются составными индексами ниже.
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='follower',
         verbose_name='Подписчик',
     )
@@ -102,6 +290,7 @@ class Follow(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='following',
+        db_index=False,
         verbose_name='Автор подписки',
     )
 
@@ -116,3 +305,265 @@ class Follow(models.Model):
                 check=~models.Q(author=models.F('user')),
             ),
         ]
+        # Уникальность (author, user) даёт индекс для подписчиков автора,
+        # а этот — для подписок читателя.
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='follow_user_author_idx',
+            ),
+        ]
+
+
+class Reaction(models.Model):
+    """Реакция пользователя; у одного пользователя — одна на объект."""
+    KINDS = (
+        ('like', '👍'),
+        ('love', '❤️'),
+        ('laugh', '😂'),
+        ('wow', '😮'),
+        ('sad', '😢'),
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        # Покрывается уникальностью (user, объект).
+        db_index=False,
+        related_name='+',
+        verbose_name='Пользователь',
+    )
+    kind = models.CharField(
+        max_length=16,
+        choices=KINDS,
+        default='like',
+        verbose_name='Реакция',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата реакции',
+    )
+
+    class Meta:
+        abstract = True
+
+
+class PostReaction(Reaction):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пост',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='post_reaction_user_unique',
+                fields=['user', 'post'],
+            ),
+        ]
+        verbose_name = 'Реакция на пост'
+        verbose_name_plural = 'Реакции на посты'
+
+
+class CommentReaction(Reaction):
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Комментарий',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='comment_reaction_user_unique',
+                fields=['user', 'comment'],
+            ),
+        ]
+        verbose_name = 'Реакция на комментарий'
+        verbose_name_plural = 'Реакции на комментарии'
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов',
+    )
+    follower_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок',
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель ленты',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='feed_user_post_unique',
+                fields=['user', 'post'],
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_user_author_idx',
+            ),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+
+
+class Suggestion(models.Model):
+    """Автор, которого стоит почитать пользователю, см. posts.suggestions."""
+    # Поле покрывается индексами ниже.
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='suggestions',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендованный автор',
+    )
+    score = models.FloatField(verbose_name='Очки')
+    mutual = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Читают авторы из подписок',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='suggestion_user_author_unique',
+                fields=['user', 'author'],
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score', 'author'],
+                name='suggestion_user_score_idx',
+            ),
+        ]
+        verbose_name = 'Рекомендация автора'
+        verbose_name_plural = 'Рекомендации авторов'
+
+
+class SearchTerm(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост',
+    )
+    term = models.CharField(
+        max_length=64,
+        verbose_name='Основа слова',
+    )
+    weight = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Число вхождений',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='search_term_post_unique',
+                fields=['term', 'post'],
+            ),
+        ]
+        verbose_name = 'Термин поиска'
+        verbose_name_plural = 'Поисковый индекс'
+
+
+class ThumbnailJob(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='thumbnail_job',
+        verbose_name='Пост',
+    )
+    requested = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата постановки в очередь',
+    )
+    claimed = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взято в работу',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Число попыток',
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Задача на миниатюры'
+        verbose_name_plural = 'Очередь миниатюр'
+
+
+class MediaFile(models.Model):
+    """Файл картинки и число постов, которые на него ссылаются."""
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Имя файла',
+    )
+    references = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число ссылок',
+    )
+
+    class Meta:
+        verbose_name = 'Файл картинки'
+        verbose_name_plural = 'Файлы картинок'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,131 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+Страница кэшируется по пути и курсору, а в ключ входят версии её
+тегов: `feed` для всех лент, `group:<slug>`, `author:<username>` и
+общий `all`. Изменение поста меняет версии своих тегов, и все
+страницы с ними перестают находиться в кэше — перебирать ключи не
+нужно. Версии меняются сразу и ещё раз после коммита: иначе
+параллельный запрос успел бы положить в кэш незакоммиченное состояние
+под новой версией.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+ALL = 'all'
+FEED = 'feed'
+
+
+def group_tag(slug):
+    return f'group:{slug}'
+
+
+def author_tag(username):
+    return f'author:{username}'
+
+
+def _tag_key(tag):
+    return f'page_tag:{tag}'
+
+
+def versions(tags):
+    """Текущие версии тегов — и для ключей фрагментов страниц."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        # Версия тегу выдаётся случайная: если кэш её вытеснит, новая
+        # не совпадёт со старыми ключами страниц.
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def page_key(request, tags):
+    raw = repr((request.path, request.GET.get('cursor'), versions(tags)))
+    return 'page:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _bump(tags):
+    cache.set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, None)
+
+
+def invalidate(*tags):
+    """Сбросить страницы с тегами сейчас и после коммита транзакции."""
+    tags = set(tags)
+    _bump(tags)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(tags))
+
+
+def tags_for(posts):
+    """Теги страниц, на которых видны посты из выборки."""
+    tags = {FEED}
+    for username, slug in posts.order_by().values_list(
+        'author__username', 'group__slug'
+    ).distinct():
+        tags.add(author_tag(username))
+        if slug:
+            tags.add(group_tag(slug))
+    return tags
+
+
+def _cacheable(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def _restore(request, cached):
+    content, content_type, etag, modified = cached
+    response = HttpResponse(content, content_type=content_type)
+    if etag:
+        response['ETag'] = etag
+    if modified:
+        response['Last-Modified'] = modified
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=modified and parse_http_date_safe(modified),
+        response=response,
+    )
+
+
+def anonymous_page_cache(*tags):
+    """Кэшировать страницу для анонимов; теги — шаблоны по kwargs URL."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            key = page_key(
+                request, [ALL] + [tag.format(**kwargs) for tag in tags]
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                return _restore(request, cached)
+            response = view(request, *args, **kwargs)
+            if _cacheable(request, response):
+                cache.set(
+                    key,
+                    (
+                        response.content,
+                        response['Content-Type'],
+                        response.get('ETag'),
+                        response.get('Last-Modified'),
+                    ),
+                    settings.PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapper
+    return decorator
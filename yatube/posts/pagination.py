@@ -0,0 +1,124 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+
+def _json_default(value):
+    # DjangoJSONEncoder обрезает микросекунды, а курсору нужна точность.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в курсор')
+
+
+def field_value(obj, name):
+    """Поле модели или строки `.values()` — словаря, а не модели."""
+    if isinstance(obj, dict):
+        return obj[name]
+    return getattr(obj, name)
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинатор: страница задаётся непрозрачным курсором.
+
+    Вместо OFFSET каждая страница выбирается условием
+    `(pub_date, id) < (последняя запись предыдущей страницы)`,
+    поэтому страница 5000 стоит столько же, сколько первая.
+    Номер страницы хранится в самом курсоре и нужен только для
+    совместимости с `Page`.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    def get_page(self, cursor):
+        """Вернуть страницу по курсору; битый курсор ведёт на первую."""
+        try:
+            values, number, backward = self.decode(cursor)
+        except (TypeError, ValueError):
+            values, number, backward = None, 1, False
+        queryset = self.object_list
+        if backward:
+            queryset = queryset.reverse()
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backward))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backward:
+            if not has_more:
+                return self.get_page(None)
+            rows.reverse()
+            has_next = True
+        else:
+            has_next = has_more
+        if values is None:
+            number = 1
+        self._num_pages = number + 1 if has_next else number
+        self.previous_cursor = (
+            self.encode(rows[0], number - 1, backward=True)
+            if rows and number > 1 else None
+        )
+        self.next_cursor = (
+            self.encode(rows[-1], number + 1) if has_next else None
+        )
+        return Page(rows, number, self)
+
+    def _fields(self):
+        return [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in self.ordering
+        ]
+
+    def _seek(self, values, backward):
+        """Лексикографическое условие «строго после курсора»."""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending != backward else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode(self, obj, number, backward=False):
+        payload = {
+            'v': [field_value(obj, name) for name, _ in self._fields()],
+            'p': number,
+        }
+        if backward:
+            payload['b'] = 1
+        raw = json.dumps(payload, default=_json_default).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode(self, cursor):
+        if not cursor:
+            return None, 1, False
+        raw = cursor + '=' * (-len(cursor) % 4)
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw.encode()))
+            values = payload['v']
+            number = int(payload['p'])
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError('Некорректный курсор') from error
+        fields = self._fields()
+        if len(values) != len(fields) or number < 1 or None in values:
+            raise ValueError('Некорректный курсор')
+        model = self.object_list.model
+        try:
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except ValidationError as error:
+            raise ValueError('Некорректный курсор') from error
+        return values, number, bool(payload.get('b'))
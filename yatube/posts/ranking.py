@@ -0,0 +1,66 @@
+"""Очки постов для ленты «Популярное».
+
+Очки считаются по формуле «горячего» рейтинга: десятичный логарифм
+вовлечённости плюс время публикации в единицах `POPULAR_DECAY_HOURS`.
+Свежесть входит слагаемым, которое не меняется со временем, поэтому
+старые посты не нужно переоценивать по часам: пост опускается сам,
+когда новые набирают больше. Пересчитываются только посты, у которых
+изменилась вовлечённость, — по сигналам и при записи счётчиков
+реакций, — а `rescore_posts` время от времени исправляет расхождения.
+Очки хранятся в индексированной колонке, и лента — это чтение
+индекса (-score, -id) без агрегации.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Post
+
+# Вес одного комментария, реакции и подписчика автора.
+COMMENT_WEIGHT = 2
+REACTION_WEIGHT = 1
+FOLLOWER_WEIGHT = 0.1
+BATCH_SIZE = 1000
+# Порядок ленты по индексу post_score_id_idx.
+POPULAR_ORDERING = ('-score', '-id')
+
+
+def score(pub_date, comments, reactions, followers):
+    engagement = (
+        comments * COMMENT_WEIGHT
+        + reactions * REACTION_WEIGHT
+        + (followers or 0) * FOLLOWER_WEIGHT
+    )
+    decay = settings.POPULAR_DECAY_HOURS * 3600
+    return math.log10(1 + engagement) + pub_date.timestamp() / decay
+
+
+def rescore(posts, batch_size=BATCH_SIZE):
+    """Пересчитать очки постов выборки; вернуть число изменённых."""
+    rows = posts.order_by().values_list(
+        'id', 'pub_date', 'comment_count', 'reaction_count',
+        'author__stats__follower_count', 'score',
+    )
+    changed = []
+    for post_id, pub_date, comments, reactions, followers, old in (
+        rows.iterator(chunk_size=batch_size)
+    ):
+        new = score(pub_date, comments, reactions, followers)
+        if new != old:
+            changed.append(Post(id=post_id, score=new))
+    Post.objects.bulk_update(changed, ['score'], batch_size=batch_size)
+    return len(changed)
+
+
+def rescore_author(author_id):
+    """Пересчитать свежие посты автора после смены числа подписчиков.
+
+    Старым постам подписчики уже не помогут подняться; их догонит
+    `rescore_posts`.
+    """
+    since = timezone.now() - timedelta(days=settings.POPULAR_RESCORE_DAYS)
+    return rescore(
+        Post.objects.filter(author_id=author_id, pub_date__gte=since)
+    )
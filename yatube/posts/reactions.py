@@ -0,0 +1,195 @@
+"""Реакции на посты и комментарии.
+
+Источник правды — таблицы `PostReaction` и `CommentReaction` с одной
+строкой на пользователя и объект. Счётчики `reaction_count` на
+популярном посте менялись бы тысячами UPDATE одной строки, поэтому
+приращения копятся в памяти процесса и раз в
+`REACTION_FLUSH_INTERVAL` секунд пишутся одним UPDATE на таблицу.
+Счётчик отстаёт не больше чем на интервал; если процесс упал, не
+успев записать буфер, расхождение исправит `recount_stats`.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from . import page_cache, ranking
+from .models import Comment, CommentReaction, Post, PostReaction
+
+logger = logging.getLogger('yatube.reactions')
+
+KINDS = dict(PostReaction.KINDS)
+
+
+class CounterBuffer:
+    """Приращения `reaction_count`, накопленные с прошлой записи."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas = defaultdict(int)
+        # Посты комментариев — чтобы сбросить кэш их страниц.
+        self.comment_posts = {}
+        self.flushed = time.monotonic()
+        self.timer = None
+
+    def add(self, target, delta):
+        interval = settings.REACTION_FLUSH_INTERVAL
+        with self.lock:
+            self.deltas[type(target), target.pk] += delta
+            if isinstance(target, Comment):
+                self.comment_posts[target.pk] = target.post_id
+            due = time.monotonic() - self.flushed >= interval
+            if not due and self.timer is None:
+                self.timer = threading.Timer(interval, self._flush_later)
+                self.timer.daemon = True
+                self.timer.start()
+        if due:
+            self.flush()
+
+    def _flush_later(self):
+        # Поток таймера открывает своё соединение с базой.
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Не удалось записать счётчики реакций')
+        finally:
+            connection.close()
+
+    def flush(self):
+        """Записать накопленное; вернуть число изменённых строк."""
+        with self.lock:
+            deltas, self.deltas = self.deltas, defaultdict(int)
+            comment_posts, self.comment_posts = self.comment_posts, {}
+            self.flushed = time.monotonic()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        try:
+            return _write(deltas, comment_posts)
+        except DatabaseError:
+            # Вернуть приращения, чтобы записать их в следующий раз.
+            with self.lock:
+                for key, delta in deltas.items():
+                    self.deltas[key] += delta
+                self.comment_posts.update(comment_posts)
+            raise
+
+
+def _write(deltas, comment_posts):
+    by_model = defaultdict(dict)
+    for (model, pk), delta in deltas.items():
+        if delta:
+            by_model[model][pk] = delta
+    if not by_model:
+        return 0
+    updated = 0
+    with transaction.atomic():
+        for model, changes in by_model.items():
+            delta = Case(
+                *(When(pk=pk, then=Value(delta))
+                  for pk, delta in changes.items()),
+                output_field=IntegerField(),
+            )
+            # Ниже нуля счётчик не уходит, даже если успел разойтись
+            # с таблицей реакций.
+            updated += model.objects.filter(pk__in=changes).update(
+                reaction_count=Greatest(F('reaction_count') + delta, 0)
+            )
+    if by_model[Post]:
+        ranking.rescore(Post.objects.filter(pk__in=by_model[Post]))
+        page_cache.invalidate(
+            *page_cache.tags_for(Post.objects.filter(pk__in=by_model[Post]))
+        )
+    touch({
+        comment_posts[pk] for pk in by_model[Comment] if pk in comment_posts
+    })
+    return updated
+
+
+buffer = CounterBuffer()
+atexit.register(buffer.flush)
+
+
+def _version_key(post_id):
+    return f'reactions:comments:{post_id}'
+
+
+def touch(post_ids):
+    """Сменить версию реакций на комментарии постов."""
+    if post_ids:
+        cache.set_many(
+            {_version_key(pk): uuid.uuid4().hex for pk in post_ids}, None
+        )
+
+
+def version(post_id):
+    """Версия реакций на комментарии поста — для ETag его страницы."""
+    return cache.get(_version_key(post_id))
+
+
+def _model(target):
+    if isinstance(target, Comment):
+        return CommentReaction, 'comment'
+    return PostReaction, 'post'
+
+
+def react(user, target, kind):
+    """Поставить или сменить реакцию; вернуть True, если она новая."""
+    if kind not in KINDS:
+        raise ValueError(f'Неизвестная реакция: {kind}')
+    model, field = _model(target)
+    _, created = model.objects.update_or_create(
+        user=user, **{field: target}, defaults={'kind': kind}
+    )
+    if created:
+        buffer.add(target, 1)
+    if field == 'comment':
+        touch({target.post_id})
+    return created
+
+
+def unreact(user, target):
+    """Снять реакцию; вернуть True, если она была."""
+    model, field = _model(target)
+    deleted, _ = model.objects.filter(user=user, **{field: target}).delete()
+    if deleted:
+        buffer.add(target, -1)
+        if field == 'comment':
+            touch({target.post_id})
+    return bool(deleted)
+
+
+def mark_reacted(user, objects):
+    """Проставить объектам `my_reaction` одним запросом.
+
+    Все объекты — посты или все — комментарии; у анонима и у пустого
+    списка запроса нет.
+    """
+    objects = list(objects)
+    for obj in objects:
+        obj.my_reaction = None
+    if not objects or not user.is_authenticated:
+        return objects
+    model, field = _model(objects[0])
+    kinds = dict(model.objects.filter(
+        user=user, **{f'{field}_id__in': [obj.pk for obj in objects]}
+    ).values_list(f'{field}_id', 'kind'))
+    for obj in objects:
+        obj.my_reaction = kinds.get(obj.pk)
+    return objects
+
+
+def page_key(objects):
+    """Реакции пользователя на странице — часть ключа кэша фрагмента."""
+    return ','.join(
+        f'{obj.pk}:{obj.my_reaction}' for obj in objects
+        if getattr(obj, 'my_reaction', None)
+    )
@@ -0,0 +1,203 @@
+"""Полнотекстовый поиск по постам на инвертированном индексе.
+
+Текст режется на слова, русские слова приводятся к основе стеммером
+Snowball (Портера), и для каждого поста хранится число вхождений
+каждой основы в таблице `SearchTerm`. Поиск ранжирует посты по числу
+совпавших основ, а затем по сумме tf·idf.
+"""
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Case, Count, F, FloatField, Sum, When
+
+from .models import AuthorStats, Post, SearchTerm
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile(r'[а-я]')
+MAX_TERM_LENGTH = 64
+
+STOP_WORDS = frozenset(
+    'а без бы в во вот вы да для до его ее если же за и из или им их к'
+    ' как ко когда ли мне мы на над не него нет ни но о об он она они'
+    ' от по при с со так там то тоже только ты у уже чем что это я'.split()
+)
+
+VOWELS = 'аеиоуыэюя'
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+SUPERLATIVE = ((), ('ейш', 'ейше'))
+DERIVATIONAL = ('ость', 'ост')
+
+
+def _region(word, start):
+    """Начало области после первой согласной, идущей за гласной."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _remove(rv, groups):
+    """Отрезать самое длинное окончание; None, если ни одно не подошло.
+
+    Окончания первой группы снимаются, только если перед ними «а» или «я».
+    """
+    after_a, plain = groups
+    endings = [(ending, True) for ending in after_a]
+    endings += [(ending, False) for ending in plain]
+    for ending, needs_a in sorted(endings, key=lambda item: -len(item[0])):
+        if not rv.endswith(ending):
+            continue
+        rest = rv[:-len(ending)]
+        if not needs_a or rest.endswith(('а', 'я')):
+            return rest
+    return None
+
+
+def _remove_adjectival(rv):
+    rest = _remove(rv, ADJECTIVE)
+    if rest is None:
+        return None
+    without_participle = _remove(rest, PARTICIPLE)
+    return rest if without_participle is None else without_participle
+
+
+def _strip_ending(rv):
+    """Шаг 1: деепричастие либо возвратность и затем прилагательное,
+    глагол или существительное."""
+    rest = _remove(rv, PERFECTIVE_GERUND)
+    if rest is not None:
+        return rest
+    rest = _remove(rv, REFLEXIVE)
+    if rest is not None:
+        rv = rest
+    for remove in (
+        _remove_adjectival,
+        lambda rv: _remove(rv, VERB),
+        lambda rv: _remove(rv, NOUN),
+    ):
+        rest = remove(rv)
+        if rest is not None:
+            return rest
+    return rv
+
+
+def _tidy(rv):
+    """Шаг 4: двойное «н», превосходная степень и мягкий знак."""
+    if rv.endswith('нн'):
+        return rv[:-1]
+    rest = _remove(rv, SUPERLATIVE)
+    if rest is not None:
+        return rest[:-1] if rest.endswith('нн') else rest
+    if rv.endswith('ь'):
+        return rv[:-1]
+    return rv
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball."""
+    word = word.replace('ё', 'е')
+    rv_start = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word),
+    )
+    prefix, rv = word[:rv_start], _strip_ending(word[rv_start:])
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    r2 = _region(word, _region(word, 0)) - rv_start
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and len(rv) - len(ending) >= r2:
+            rv = rv[:-len(ending)]
+            break
+    return prefix + _tidy(rv)
+
+
+def tokenize(text):
+    """Основы слов текста в порядке появления, без стоп-слов."""
+    terms = []
+    for word in WORD_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if CYRILLIC_RE.search(word):
+            word = stem(word)
+        terms.append(word[:MAX_TERM_LENGTH])
+    return terms
+
+
+def index_post(post):
+    SearchTerm.objects.filter(post=post).delete()
+    SearchTerm.objects.bulk_create([
+        SearchTerm(post=post, term=term, weight=weight)
+        for term, weight in Counter(tokenize(post.text)).items()
+    ])
+
+
+def rebuild_index(posts=None):
+    if posts is None:
+        posts = Post.objects.all()
+    for post in posts.only('id', 'text').iterator():
+        index_post(post)
+
+
+def ranked(query):
+    """Значения `{'post', 'matched', 'score'}` в порядке релевантности."""
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return SearchTerm.objects.none()
+    matches = SearchTerm.objects.filter(term__in=terms)
+    frequencies = dict(
+        matches.order_by().values_list('term').annotate(Count('id'))
+    )
+    total = AuthorStats.objects.aggregate(total=Sum('post_count'))['total']
+    idf = {
+        term: math.log(1 + (total or 1) / frequencies.get(term, 1))
+        for term in terms
+    }
+    return matches.order_by().values('post').annotate(
+        matched=Count('id'),
+        score=Sum(Case(
+            *[When(term=term, then=F('weight') * weight)
+              for term, weight in idf.items()],
+            output_field=FloatField(),
+        )),
+    ).order_by('-matched', '-score', '-post')
+
+
+def search_page(query, number):
+    """Страница результатов с постами вместо строк индекса."""
+    page = Paginator(ranked(query), settings.NUM_POSTS).get_page(number)
+    posts = Post.objects.for_feed().in_bulk(
+        [row['post'] for row in page.object_list]
+    )
+    page.object_list = [
+        posts[row['post']] for row in page.object_list if row['post'] in posts
+    ]
+    return page
@@ -0,0 +1,186 @@
+from django.conf import settings
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import (
+    counters, feed, media, page_cache, ranking, search, suggestions,
+    thumbnails,
+)
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+# Поля пользователя, которые видны на карточке поста.
+CARD_USER_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def touch_author_posts(sender, instance, raw=False, update_fields=None,
+                       **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+        CARD_USER_FIELDS
+    ):
+        return
+    stored = User.objects.filter(pk=instance.pk).values(
+        *CARD_USER_FIELDS
+    ).first()
+    current = {field: getattr(instance, field) for field in CARD_USER_FIELDS}
+    if stored is not None and stored != current:
+        posts = Post.objects.filter(author_id=instance.pk)
+        page_cache.invalidate(
+            page_cache.author_tag(instance.username),
+            *page_cache.tags_for(posts),
+        )
+        posts.update(updated=timezone.now())
+
+
+@receiver(post_save, sender=Group)
+def touch_group_posts(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        posts = Post.objects.filter(group=instance)
+        page_cache.invalidate(
+            page_cache.group_tag(instance.slug), *page_cache.tags_for(posts)
+        )
+        posts.update(updated=timezone.now())
+
+
+@receiver(post_migrate)
+def invalidate_all_pages(sender, **kwargs):
+    if sender.name == 'posts':
+        page_cache.invalidate(page_cache.ALL)
+
+
+@receiver(pre_save, sender=Post)
+def remember_stored_post(sender, instance, raw=False, **kwargs):
+    instance._stored = None
+    if not raw and instance.pk is not None:
+        instance._stored = Post.objects.filter(pk=instance.pk).values(
+            'image', 'group__slug'
+        ).first()
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    if raw or update_fields is not None and 'image' not in update_fields:
+        return
+    stored = (getattr(instance, '_stored', None) or {}).get('image') or ''
+    if stored == (instance.image.name or ''):
+        return
+    if instance.image:
+        media.acquire(instance.image.name)
+    if stored:
+        media.release(stored)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_author(instance.author_id, post_count=1)
+        feed.fan_out(instance)
+        ranking.rescore(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, raw=False, **kwargs):
+    if instance.image and not raw:
+        thumbnails.enqueue(instance)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tags = page_cache.tags_for(Post.objects.filter(pk=instance.pk))
+    stored = getattr(instance, '_stored', None)
+    if stored and stored['group__slug']:
+        # Пост могли перенести из другой группы.
+        tags.add(page_cache.group_tag(stored['group__slug']))
+    page_cache.invalidate(*tags)
+
+
+@receiver(pre_delete, sender=Post)
+def invalidate_deleted_post_pages(sender, instance, **kwargs):
+    page_cache.invalidate(
+        *page_cache.tags_for(Post.objects.filter(pk=instance.pk))
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump_author(instance.author_id, post_count=-1)
+    if instance.image:
+        media.release(instance.image.name)
+
+
+def invalidate_comment_pages(comment):
+    # Число комментариев видно на карточках поста.
+    page_cache.invalidate(
+        *page_cache.tags_for(Post.objects.filter(pk=comment.post_id))
+    )
+
+
+def invalidate_follow_pages(follow):
+    # Счётчики подписок видны в профилях, подписчики — на карточках.
+    usernames = User.objects.filter(
+        pk__in=(follow.user_id, follow.author_id)
+    ).values_list('username', flat=True)
+    page_cache.invalidate(
+        *map(page_cache.author_tag, usernames),
+        *page_cache.tags_for(Post.objects.filter(author_id=follow.author_id)),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_comments(instance.post_id, 1)
+        counters.bump_replies(instance, 1)
+        ranking.rescore(Post.objects.filter(pk=instance.post_id))
+        invalidate_comment_pages(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+    # Каскад удаляет потомков по одному, и каждый уменьшает предков.
+    counters.bump_replies(instance, -1)
+    ranking.rescore(Post.objects.filter(pk=instance.post_id))
+    invalidate_comment_pages(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_author(instance.author_id, follower_count=1)
+        counters.bump_author(instance.user_id, following_count=1)
+        feed.backfill(instance.user_id, instance.author_id)
+        ranking.rescore_author(instance.author_id)
+        suggestions.refresh(instance.user_id)
+        invalidate_follow_pages(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_author(instance.author_id, follower_count=-1)
+    counters.bump_author(instance.user_id, following_count=-1)
+    feed.prune(instance.user_id, instance.author_id)
+    feed.demote(instance.author_id)
+    ranking.rescore_author(instance.author_id)
+    suggestions.refresh(instance.user_id)
+    invalidate_follow_pages(instance)
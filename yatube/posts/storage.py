@@ -0,0 +1,39 @@
+"""Хранилище картинок постов, адресуемое содержимым.
+
+Файл называется по SHA-256 своего содержимого и лежит в
+`<каталог>/ab/cd/abcd….ext`, поэтому одинаковые загрузки превращаются
+в один файл. Сколько постов ссылается на файл, считает `MediaFile`
+(см. `posts.media`), он же удаляет файлы, на которые больше никто не
+ссылается.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        key = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, key[:2], key[2:4], key + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Такой файл уже загружали.
+            return name
+        return super().save(name, content, max_length)
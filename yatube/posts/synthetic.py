@@ -0,0 +1,200 @@
+"""Синтетические данные для нагрузочного тестирования.
+
+Граф похож на настоящий: популярность авторов распределена по
+степенному закону — несколько авторов с тысячами подписчиков и длинный
+хвост, — посты публикуются сериями, а комментарии достаются в основном
+популярным постам. Записи генерируются потоком в формате
+`posts.bulk_import` и загружаются его `Importer`.
+"""
+import random
+from array import array
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from .models import Post
+
+SCALES = {
+    'small': {
+        'users': 200, 'groups': 10, 'posts': 5000,
+        'follows': 3000, 'comments': 10000,
+    },
+    'medium': {
+        'users': 5000, 'groups': 50, 'posts': 100000,
+        'follows': 100000, 'comments': 300000,
+    },
+    'large': {
+        'users': 50000, 'groups': 200, 'posts': 1000000,
+        'follows': 1500000, 'comments': 3000000,
+    },
+}
+USERNAME = 'synthetic_user{}'
+GROUP_SLUG = 'synthetic-group-{}'
+# Показатель степенного закона: чем больше, тем сильнее перекос.
+ALPHA = 1.1
+# Средний размер серии постов одного автора и пауза внутри серии.
+BURST_SHAPE = 1.5
+BURST_GAP = timedelta(minutes=5)
+
+
+def _cum_weights(size):
+    return list(accumulate(1 / (rank + 1) ** ALPHA for rank in range(size)))
+
+
+class Generator:
+    """Записи пользователей, групп, постов, комментариев и подписок."""
+
+    def __init__(self, users, groups, posts, follows, comments,
+                 images=0.1, days=365, seed=0, password=None,
+                 first_post_id=1, first_comment_id=1):
+        self.volume = {
+            'users': users, 'groups': groups, 'posts': posts,
+            'follows': follows, 'comments': comments,
+        }
+        self.images = images
+        self.days = days
+        self.random = random.Random(seed)
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(seed)
+        self.password = password and make_password(password)
+        self.first_post_id = first_post_id
+        self.first_comment_id = first_comment_id
+        self.now = timezone.now().replace(microsecond=0)
+        self.usernames = [USERNAME.format(n) for n in range(users)]
+        self.author_weights = _cum_weights(users)
+        # Даты постов для комментариев; array экономит память на 10^6.
+        self.post_dates = array('d')
+        self.image_names = []
+
+    def _popular(self, population, cum_weights, k=1):
+        return self.random.choices(population, cum_weights=cum_weights, k=k)
+
+    def users(self):
+        start = self.now - timedelta(days=self.days)
+        for username in self.usernames:
+            yield {
+                'username': username,
+                'first_name': self.fake.first_name(),
+                'last_name': self.fake.last_name(),
+                'password': self.password,
+                'date_joined': start.isoformat(),
+            }
+
+    def groups(self):
+        for number in range(self.volume['groups']):
+            yield {
+                'slug': GROUP_SLUG.format(number),
+                'title': self.fake.sentence(nb_words=3).rstrip('.'),
+                'description': self.fake.paragraph(),
+            }
+
+    def prepare_images(self, count=20):
+        """Сохранить несколько картинок, которые разделят посты."""
+        storage = Post._meta.get_field('image').storage
+        upload_to = Post._meta.get_field('image').upload_to
+        for number in range(count):
+            image = Image.new('RGB', (1280, 720), self._colour())
+            ImageDraw.Draw(image).ellipse(
+                (320, 100, 960, 620), fill=self._colour()
+            )
+            content = BytesIO()
+            image.save(content, 'JPEG', quality=80)
+            self.image_names.append(storage.save(
+                f'{upload_to}synthetic{number}.jpg',
+                ContentFile(content.getvalue()),
+            ))
+
+    def _colour(self):
+        return tuple(self.random.randrange(256) for _ in range(3))
+
+    def _timeline(self):
+        """Даты публикаций: серии постов с экспоненциальными паузами."""
+        total = self.volume['posts']
+        span = timedelta(days=self.days).total_seconds()
+        mean_burst = BURST_SHAPE / (BURST_SHAPE - 1)
+        moment = self.now.timestamp() - span
+        produced = 0
+        while produced < total:
+            burst = min(
+                int(self.random.paretovariate(BURST_SHAPE)), total - produced
+            )
+            author = self._popular(self.usernames, self.author_weights)[0]
+            moment += self.random.expovariate(total / span / mean_burst)
+            for number in range(burst):
+                yield author, min(
+                    moment + number * BURST_GAP.total_seconds(),
+                    self.now.timestamp(),
+                )
+            produced += burst
+
+    def posts(self):
+        groups = [
+            GROUP_SLUG.format(n) for n in range(self.volume['groups'])
+        ]
+        for number, (author, moment) in enumerate(self._timeline()):
+            self.post_dates.append(moment)
+            pub_date = datetime.fromtimestamp(moment, timezone.utc)
+            with_image = self.image_names and self.random.random() < (
+                self.images
+            )
+            yield {
+                'id': self.first_post_id + number,
+                'author': author,
+                'group': (
+                    self.random.choice(groups)
+                    if groups and self.random.random() < 0.7 else None
+                ),
+                'text': self.fake.text(self.random.choice((80, 300, 1000))),
+                'pub_date': pub_date.isoformat(),
+                'image': (
+                    self.random.choice(self.image_names)
+                    if with_image else None
+                ),
+            }
+
+    def comments(self):
+        """Комментарии к постам; вызывать после `posts()`."""
+        count = len(self.post_dates)
+        if not count:
+            return
+        # Популярность постов не связана с их порядком.
+        order = list(range(count))
+        self.random.shuffle(order)
+        weights = _cum_weights(count)
+        sentences = [self.fake.sentence() for _ in range(500)]
+        for number, index in enumerate(
+            self._popular(order, weights, self.volume['comments'])
+        ):
+            created = min(
+                self.post_dates[index]
+                + self.random.expovariate(1 / 3600 / 6),
+                self.now.timestamp(),
+            )
+            yield {
+                'id': self.first_comment_id + number,
+                'post_id': self.first_post_id + index,
+                'author': self.random.choice(self.usernames),
+                'text': self.random.choice(sentences),
+                'created': datetime.fromtimestamp(
+                    created, timezone.utc
+                ).isoformat(),
+            }
+
+    def follows(self):
+        """Подписки: читатели случайные, авторы — по степенному закону."""
+        pairs = set()
+        attempts = 0
+        target = self.volume['follows']
+        while len(pairs) < target and attempts < target * 3:
+            attempts += 1
+            user = self.random.choice(self.usernames)
+            author = self._popular(self.usernames, self.author_weights)[0]
+            if user != author and (user, author) not in pairs:
+                pairs.add((user, author))
+                yield {'user': user, 'author': author}
@@ -0,0 +1,38 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post):
+    """Ключ карточки меняется вместе со всем, что в ней показано."""
+    try:
+        followers = post.author.stats.follower_count
+    except ObjectDoesNotExist:
+        followers = 0
+    return (
+        f'post_card:{post.pk}:{post.updated.timestamp()}:'
+        f'{post.comment_count}:{post.reaction_count}:{followers}'
+    )
+
+
+@register.simple_tag
+def prefetch_post_cards(posts):
+    """Достать из кэша все карточки страницы одним запросом."""
+    return cache.get_many([card_key(post) for post in posts])
+
+
+@register.simple_tag
+def post_card(post, cards=None):
+    key = card_key(post)
+    html = cards.get(key) if isinstance(cards, dict) else cache.get(key)
+    if html is None:
+        html = get_template(CARD_TEMPLATE).render({'post': post})
+        cache.set(key, html, settings.POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(html)
@@ -0,0 +1,34 @@
+from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w' for width, name in variants
+    )
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post, sizes='100vw'):
+    """`<picture>` со всеми вариантами картинки или заглушка, пока их нет."""
+    width, height = settings.POST_IMAGE_RATIO
+    context = {'width': width, 'height': height, 'sizes': sizes}
+    variants = post.variants
+    if variants is None:
+        return context
+    *sources, fallback = variants['sources']
+    context.update(
+        ready=True,
+        width=variants['width'],
+        height=variants['height'],
+        sources=[
+            {'type': source['type'], 'srcset': _srcset(source['srcset'])}
+            for source in sources
+        ],
+        src=default_storage.url(fallback['srcset'][-1][1]),
+        srcset=_srcset(fallback['srcset']),
+    )
+    return context
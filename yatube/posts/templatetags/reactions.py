@@ -0,0 +1,19 @@
+from django import template
+
+from ..reactions import KINDS
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/reactions.html', takes_context=True)
+def reaction_buttons(context, target, url):
+    """Кнопки реакций; отмеченная пользователем снимает реакцию."""
+    request = context['request']
+    return {
+        'kinds': KINDS.items(),
+        'current': getattr(target, 'my_reaction', None),
+        'url': url,
+        'next': request.get_full_path(),
+        'csrf_token': context.get('csrf_token'),
+        'user': request.user,
+    }
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+from ..templatetags.post_cards import card_key
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='card_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='card_group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Текст карточки'
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Гостю страница отдаётся из кэша целиком, минуя карточки.
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse(
+            'posts:profile', kwargs={'username': self.user.username}
+        )
+
+    def reload(self):
+        return Post.objects.for_feed().get(pk=self.post.pk)
+
+    def test_card_is_cached(self):
+        self.client.get(self.url)
+        key = card_key(self.reload())
+        self.assertIn('Текст карточки', cache.get(key))
+        cache.set(key, '<article>из кэша</article>')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'из кэша')
+
+    def test_card_key_follows_post_changes(self):
+        keys = {card_key(self.reload())}
+        self.post.text = 'Новый текст'
+        self.post.save()
+        keys.add(card_key(self.reload()))
+        Comment.objects.create(post=self.post, author=self.user, text='К')
+        keys.add(card_key(self.reload()))
+        self.group.title = 'Новое название'
+        self.group.save()
+        keys.add(card_key(self.reload()))
+        self.user.first_name = 'Имя'
+        self.user.save()
+        keys.add(card_key(self.reload()))
+        self.assertEqual(len(keys), 5)
+
+    def test_login_does_not_touch_posts(self):
+        updated = self.reload().updated
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.reload().updated, updated)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(NUM_COMMENTS=3, MAX_COMMENTS=5)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='comment_author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Коммент {number}'
+            )
+            for number in range(8)
+        ]
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def texts(self, page):
+        return [comment.text for comment in page]
+
+    def test_post_detail_shows_first_page(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            self.texts(comments), ['Коммент 0', 'Коммент 1', 'Коммент 2']
+        )
+        self.assertNotContains(response, 'Коммент 3')
+        self.assertContains(
+            response,
+            reverse('posts:comments', kwargs={'post_id': self.post.id}),
+        )
+
+    def test_newest_first(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            {'order': 'newest'},
+        )
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            ['Коммент 7', 'Коммент 6', 'Коммент 5'],
+        )
+
+    def test_load_more_walks_all_comments(self):
+        url = reverse('posts:comments', kwargs={'post_id': self.post.id})
+        seen = []
+        params = {}
+        while True:
+            response = self.guest_client.get(url, params)
+            comments = response.context['comments']
+            self.assertNotContains(response, '<html')
+            seen += self.texts(comments)
+            if not comments.has_next():
+                break
+            params = {'cursor': comments.paginator.next_cursor}
+        self.assertEqual(seen, [comment.text for comment in self.comments])
+
+    def test_limit_is_capped(self):
+        url = reverse('posts:comments', kwargs={'post_id': self.post.id})
+        response = self.guest_client.get(url, {'limit': 1000})
+        self.assertEqual(len(response.context['comments']), 5)
+        response = self.guest_client.get(url, {'limit': 'много'})
+        self.assertEqual(len(response.context['comments']), 3)
+
+    def test_missing_post(self):
+        response = self.guest_client.get(
+            reverse('posts:comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
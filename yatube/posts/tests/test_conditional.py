@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='etag_author')
+        cls.reader = User.objects.create_user(username='etag_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='etag_group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            'detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}
+            ),
+        }
+
+    def etag(self, url, client=None):
+        response = (client or self.guest_client).get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_not_modified_with_one_query(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.etag(url)
+                # Без кэша страниц для анонимов: проверяются сами валидаторы.
+                cache.clear()
+                with self.assertNumQueries(1):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_no_last_modified(self):
+        # Счётчики меняются без отметки времени: валидатор — только ETag.
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(url)
+                self.assertFalse(response.has_header('Last-Modified'))
+        Follow.objects.create(user=self.reader, author=self.author)
+        cache.clear()
+        response = self.guest_client.get(
+            self.urls['detail'], HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_invalidate_etag(self):
+        changes = {
+            'index': lambda: Post.objects.create(
+                author=self.reader, text='Новый пост'
+            ),
+            'group': lambda: Group.objects.filter(pk=self.group.pk).update(
+                description='Новое описание'
+            ),
+            'profile': lambda: Follow.objects.create(
+                user=self.reader, author=self.author
+            ),
+            'detail': lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Коммент'
+            ),
+        }
+        for name, change in changes.items():
+            with self.subTest(page=name):
+                etag = self.etag(self.urls[name])
+                change()
+                # `update()` обходит сигналы и кэш страниц для анонимов:
+                # проверяется сам ETag.
+                cache.clear()
+                self.assertNotEqual(self.etag(self.urls[name]), etag)
+
+    def test_etag_depends_on_user(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertNotEqual(
+                    self.etag(url),
+                    self.etag(url, self.authorized_client),
+                )
@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counter_user')
+        cls.author = User.objects.create_user(username='counter_author')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Ещё пост')
+        Comment.objects.create(post=post, author=self.user, text='Коммент')
+        post.refresh_from_db()
+        self.assertEqual(self.stats(self.author).post_count, 2)
+        self.assertEqual(post.comment_count, 1)
+        post.comments.all().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(self.author).post_count, 1)
+
+    def test_follow_counters(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.stats(self.author).follower_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        Follow.objects.filter(user=self.user).delete()
+        self.assertEqual(self.stats(self.author).follower_count, 0)
+        self.assertEqual(self.stats(self.user).following_count, 0)
+
+    def test_recount_stats_fixes_drift(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.user, text='Коммент')
+        AuthorStats.objects.filter(user=self.author).update(post_count=7)
+        AuthorStats.objects.filter(user=self.user).delete()
+        Post.objects.update(comment_count=5)
+        call_command('recount_stats', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(self.stats(self.author).post_count, 1)
+        self.assertEqual(self.stats(self.user).post_count, 0)
+        self.assertEqual(post.comment_count, 1)
@@ -0,0 +1,93 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..export import export
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='export_author')
+        cls.reader = User.objects.create_user(username='export_reader')
+        cls.staff = User.objects.create_user(
+            username='export_staff', is_staff=True
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='export_group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост, "{number}"'
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Коммент'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def read(self, *args, **kwargs):
+        return b''.join(export(*args, **kwargs)).decode()
+
+    def test_ndjson_is_resumable(self):
+        lines = self.read('posts', chunk_size=2).splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [record['id'] for record in records],
+            [post.id for post in self.posts],
+        )
+        self.assertEqual(records[0]['text'], self.posts[0].text)
+        rest = self.read('posts', after=records[2]['id']).splitlines()
+        self.assertEqual(lines[3:], rest)
+
+    def test_csv(self):
+        rows = list(csv.reader(self.read('comments', 'csv').splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'post_id', 'author_id'])
+        self.assertEqual(rows[1][3], 'Коммент')
+        posts = list(csv.reader(self.read('posts', 'csv').splitlines()))
+        self.assertEqual(posts[1][3], self.posts[0].text)
+
+    def test_gzip(self):
+        data = b''.join(export('follows', gzip=True))
+        record = json.loads(gzip.decompress(data))
+        self.assertEqual(record['user_id'], self.reader.id)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'groups.csv.gz')
+            call_command(
+                'export_data', 'groups', format='csv', gzip=True, output=path
+            )
+            with gzip.open(path, 'rt') as output:
+                rows = list(csv.reader(output))
+        self.assertEqual(rows[1][1], self.group.slug)
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('api:export', kwargs={'table': 'posts'})
+        client = Client()
+        client.force_login(self.reader)
+        self.assertEqual(client.get(url).status_code, 403)
+        client.force_login(self.staff)
+        response = client.get(url, {'after': self.posts[3].id})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(json.loads(lines[0])['id'], self.posts[4].id)
+        self.assertEqual(
+            client.get(reverse(
+                'api:export', kwargs={'table': 'users'}
+            )).status_code,
+            404,
+        )
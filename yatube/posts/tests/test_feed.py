@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import feed
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Post.objects.create(author=cls.author, text='Старый пост')
+        Post.objects.create(author=cls.stranger, text='Чужой пост')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.user).count(), 1
+        )
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        feed = self.feed()
+        self.assertEqual(feed[0], post)
+        self.assertEqual(len(feed), 2)
+        self.assertTrue(all(item.author == self.author for item in feed))
+
+    def test_unfollow_prunes_feed(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.filter(user=self.user, author=self.author).delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_celebrity_posts_are_merged_on_read(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост звезды')
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        feed = self.feed()
+        self.assertEqual(feed[0], post)
+        self.assertEqual(len(feed), 2)
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_demoted_author_posts_stay_in_feed(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.stranger, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост звезды')
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        Follow.objects.filter(user=self.stranger).delete()
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.feed()[0], post)
+
+    def test_rebuild_does_not_query_per_follow(self):
+        User.objects.bulk_create([
+            User(username=f'bulk_reader{number}') for number in range(20)
+        ])
+        readers = User.objects.filter(username__startswith='bulk_reader')
+        Follow.objects.bulk_create([
+            Follow(user=reader, author=self.author) for reader in readers
+        ])
+        with self.assertNumQueries(5):
+            feed.rebuild_feeds()
+        self.assertEqual(
+            FeedEntry.objects.filter(user__in=readers).count(), 20
+        )
@@ -1,12 +1,16 @@
+import hashlib
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
+from PIL import Image
 
+from ..forms import PostForm
 from ..models import Group, Post, Comment
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -69,12 +73,13 @@ class PostFormTests(TestCase):
             'posts:profile', kwargs={'username': self.user.username}
         ))
         self.assertEqual(Post.objects.count(), posts_count + 1)
+        digest = hashlib.sha256(self.small_gif).hexdigest()
         self.assertTrue(
             Post.objects.filter(
                 text=form_data['text'],
                 group_id=form_data['group'],
                 author=self.user,
-                image='posts/small.gif',
+                image=f'posts/{digest[:2]}/{digest[2:4]}/{digest}.gif',
             ).exists()
         )
 
@@ -118,3 +123,58 @@ class PostFormTests(TestCase):
                 post=self.post
             ).exists()
         )
+
+
+def photo(size, **save_options):
+    buffer = BytesIO()
+    Image.new('RGB', size, (10, 120, 200)).save(buffer, 'JPEG', **save_options)
+    return SimpleUploadedFile(
+        'photo.jpg', buffer.getvalue(), content_type='image/jpeg'
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIZE=(400, 400),
+    POST_IMAGE_MAX_PIXELS=1_000_000,
+)
+class PostImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def form(self, image):
+        return PostForm({'text': 'Фото'}, {'image': image})
+
+    def test_large_photo_is_downsized_without_exif(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        form = self.form(photo((800, 600), exif=exif))
+        self.assertTrue(form.is_valid(), form.errors)
+        post = form.instance
+        self.assertEqual((post.image_width, post.image_height), (400, 300))
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.size, (400, 300))
+        self.assertNotIn('exif', image.info)
+        self.assertEqual(post.image_bytes, form.cleaned_data['image'].size)
+
+    def test_small_photo_is_kept(self):
+        upload = photo((200, 100))
+        form = self.form(upload)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertIs(form.cleaned_data['image'], upload)
+        self.assertEqual(form.instance.image_width, 200)
+
+    def test_too_many_pixels(self):
+        form = self.form(photo((2000, 1000)))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'too_many_pixels')
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_too_large_file(self):
+        form = self.form(photo((200, 100)))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'file_too_large')
@@ -0,0 +1,149 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import AuthorStats, Comment, FeedEntry, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ImportDataTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        User.objects.create_user(username='old_reader')
+
+    def write_ndjson(self, name, records):
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as output:
+            for record in records:
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def write_csv(self, name, records):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            writer = csv.DictWriter(output, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
+        return path
+
+    def load(self, *sources, batch_size=2):
+        out = StringIO()
+        call_command(
+            'import_data', *sources, batch_size=batch_size, stdout=out
+        )
+        return out.getvalue()
+
+    def sources(self):
+        return [
+            'users=' + self.write_csv('users.csv', [
+                {'username': 'old_author', 'first_name': 'Лев'},
+                {'username': 'old_other', 'first_name': ''},
+            ]),
+            'groups=' + self.write_ndjson('groups.ndjson', [
+                {'slug': 'old_group', 'title': 'Старая группа'},
+            ]),
+            'posts=' + self.write_ndjson('posts.ndjson.gz', [
+                {
+                    'id': 100 + number,
+                    'author': 'old_author',
+                    'group': 'old_group',
+                    'text': f'Архивный пост {number}',
+                    'pub_date': f'2015-01-0{number + 1}T10:00:00',
+                }
+                for number in range(3)
+            ] + [
+                {'id': 200, 'author': 'nobody', 'text': 'Сирота'},
+                {'id': 'x1', 'author': 'old_author', 'text': 'Без id'},
+            ]),
+            'comments=' + self.write_csv('comments.csv', [
+                {'id': 500, 'post_id': 100, 'author': 'old_other',
+                 'text': 'Ответ', 'created': '2015-01-02T12:00:00+00:00'},
+                {'id': 501, 'post_id': 999, 'author': 'old_other',
+                 'text': 'Мимо', 'created': ''},
+                {'id': '', 'post_id': 100, 'author': 'old_other',
+                 'text': 'Без id', 'created': ''},
+                {'id': 502, 'post_id': 'x1', 'author': 'old_other',
+                 'text': 'Не тот пост', 'created': ''},
+            ]),
+            'follows=' + self.write_ndjson('follows.ndjson', [
+                {'user': 'old_reader', 'author': 'old_author'},
+                {'user': 'old_author', 'author': 'old_author'},
+            ]),
+        ]
+
+    def test_import_preserves_dates_and_rebuilds(self):
+        output = self.load(*reversed(self.sources()))
+        self.assertIn('Загружено записей: 8, пропущено: 6', output)
+        post = Post.objects.get(id=100)
+        self.assertEqual(
+            post.pub_date, datetime(2015, 1, 1, 10, tzinfo=timezone.utc)
+        )
+        self.assertEqual(post.updated, post.pub_date)
+        self.assertEqual(post.group, Group.objects.get(slug='old_group'))
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(
+            Comment.objects.get().created.year, 2015
+        )
+        author = User.objects.get(username='old_author')
+        self.assertFalse(author.has_usable_password())
+        stats = AuthorStats.objects.get(user=author)
+        self.assertEqual((stats.post_count, stats.follower_count), (3, 1))
+        reader = User.objects.get(username='old_reader')
+        self.assertEqual(FeedEntry.objects.filter(user=reader).count(), 3)
+        self.assertTrue(post.search_terms.exists())
+        # Новые посты снова получают дату публикации автоматически.
+        fresh = Post.objects.create(author=author, text='Новый пост')
+        self.assertGreater(fresh.pub_date.year, 2015)
+        self.assertGreater(fresh.id, 102)
+
+    def test_feeds_are_rebuilt_for_imported_rows_only(self):
+        reader = User.objects.get(username='old_reader')
+        earlier = User.objects.create_user(username='earlier')
+        Post.objects.create(author=earlier, text='Пост до загрузки')
+        # Подписка в обход сигналов: ленту ей никто не заполнял.
+        Follow.objects.bulk_create([Follow(user=reader, author=earlier)])
+        self.load(*self.sources())
+        self.assertEqual(
+            set(FeedEntry.objects.filter(user=reader).values_list(
+                'author__username', flat=True
+            )),
+            {'old_author'},
+        )
+
+    def test_repeated_import_skips_loaded_rows(self):
+        sources = self.sources()
+        self.load(*sources)
+        output = self.load(*sources)
+        self.assertIn('Загружено записей: 1, пропущено: 13', output)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_only_known_password_hashes_are_kept(self):
+        self.load('users=' + self.write_csv('users.csv', [
+            {'username': 'old_hashed', 'password': make_password('secret')},
+            {'username': 'old_plain', 'password': 'secret'},
+            {'username': 'old_foreign', 'password': 'md5crypt$1$abc$def'},
+        ]))
+        self.assertTrue(
+            User.objects.get(username='old_hashed').check_password('secret')
+        )
+        for username in ('old_plain', 'old_foreign'):
+            with self.subTest(username=username):
+                user = User.objects.get(username=username)
+                self.assertFalse(user.has_usable_password())
+                self.assertFalse(user.check_password('secret'))
@@ -0,0 +1,82 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Полный проход таблицы без индекса и сортировка во временном дереве.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)$')
+FILESORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План читается в формате SQLite')
+class FeedIndexTests(TestCase):
+    """Запросы лент идут по индексам и не сортируют строки отдельно."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='index_reader')
+        cls.author = User.objects.create_user(username='index_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='index_group', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(15):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text='Коммент'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_views_use_indexes(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:popular'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:follow_index'),
+            reverse('api:posts'),
+            reverse('api:popular'),
+            reverse('api:group', kwargs={'slug': self.group.slug}),
+            reverse('api:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('api:follow_feed'),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+            selects = [
+                query['sql'] for query in queries.captured_queries
+                if query['sql'].startswith('SELECT')
+                and 'posts_' in query['sql']
+            ]
+            self.assertTrue(selects)
+            for sql in selects:
+                with self.subTest(url=url, sql=sql):
+                    plan = self.plan(sql)
+                    self.assertNotIn(FILESORT, plan)
+                    self.assertFalse(
+                        [step for step in plan if FULL_SCAN.match(step)]
+                    )
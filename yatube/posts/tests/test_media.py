@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from .. import media
+from ..models import MediaFile, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def upload(content):
+    return SimpleUploadedFile('meme.gif', content, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedMediaTests(TransactionTestCase):
+    # Файлы удаляются в on_commit, поэтому нужны настоящие транзакции.
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='media_author')
+
+    def create(self, content=b'GIF89a meme'):
+        return Post.objects.create(
+            author=self.user, text='Мем', image=upload(content)
+        )
+
+    def references(self, post):
+        return MediaFile.objects.get(name=post.image.name).references
+
+    def exists(self, post):
+        return post.image.storage.exists(post.image.name)
+
+    def test_identical_uploads_share_file(self):
+        first, second = self.create(), self.create()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/\w\w/\w\w/\w{64}\.gif$')
+        self.assertEqual(self.references(first), 2)
+        self.assertNotEqual(
+            self.create(b'GIF89a another').image.name, first.image.name
+        )
+
+    def test_file_deleted_with_last_reference(self):
+        first, second = self.create(), self.create()
+        first.delete()
+        self.assertTrue(self.exists(second))
+        self.assertEqual(self.references(second), 1)
+        second.delete()
+        self.assertFalse(self.exists(second))
+        self.assertFalse(MediaFile.objects.exists())
+
+    def test_replaced_image_is_released(self):
+        post = self.create()
+        old = post.image.name
+        post.image = upload(b'GIF89a new')
+        post.save()
+        self.assertFalse(post.image.storage.exists(old))
+        self.assertEqual(self.references(post), 1)
+        post.text = 'Только текст'
+        post.save()
+        self.assertEqual(self.references(post), 1)
+
+    def test_collect_media(self):
+        post = self.create()
+        Post.objects.filter(pk=post.pk).update(image='')
+        orphan = default_storage.save('variants/aa/bb/320.jpg', upload(b'x'))
+        self.assertEqual(media.recount(), 1)
+        self.assertEqual(media.collect_garbage(grace=timedelta(hours=1)), 0)
+        call_command('collect_media', stdout=StringIO())
+        self.assertTrue(self.exists(post))
+        self.assertEqual(media.collect_garbage(grace=timedelta(0)), 2)
+        self.assertFalse(self.exists(post))
+        self.assertFalse(os.path.exists(default_storage.path(orphan)))
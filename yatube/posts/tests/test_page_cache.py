@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='page_author')
+        cls.other = User.objects.create_user(username='page_other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='page_group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='page_other_group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Старый пост'
+        )
+        Post.objects.create(
+            author=cls.other, group=cls.other_group, text='Чужой пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            'other_group': reverse(
+                'posts:group_list', kwargs={'slug': self.other_group.slug}
+            ),
+            'other_profile': reverse(
+                'posts:profile', kwargs={'username': self.other.username}
+            ),
+        }
+
+    def assertCached(self, url, cached=True):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(not queries.captured_queries, cached)
+        return response
+
+    def test_anonymous_pages_are_cached(self):
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                self.assertCached(url)
+
+    def test_cursor_is_part_of_key(self):
+        self.guest_client.get(self.urls['index'])
+        self.assertCached(self.urls['index'] + '?cursor=broken', False)
+
+    def test_authorized_pages_are_not_cached(self):
+        client = Client()
+        client.force_login(self.other)
+        client.get(self.urls['group'])
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Тихая правка', updated=timezone.now()
+        )
+        self.assertContains(client.get(self.urls['group']), 'Тихая правка')
+
+    def test_new_post_purges_only_its_pages(self):
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Свежий пост'
+        )
+        for name in ('index', 'group', 'profile'):
+            with self.subTest(page=name):
+                response = self.assertCached(self.urls[name], False)
+                self.assertContains(response, 'Свежий пост')
+        for name in ('other_group', 'other_profile'):
+            with self.subTest(page=name):
+                self.assertCached(self.urls[name])
+
+    def test_edit_delete_and_comment_purge_pages(self):
+        changes = (
+            lambda: Comment.objects.create(
+                post=self.post, author=self.other, text='Коммент'
+            ),
+            lambda: Post.objects.get(pk=self.post.pk).save(),
+            lambda: Post.objects.get(pk=self.post.pk).delete(),
+        )
+        for change in changes:
+            with self.subTest(change=change):
+                self.guest_client.get(self.urls['group'])
+                change()
+                self.assertCached(self.urls['group'], False)
+
+    def test_cached_page_answers_conditional_get(self):
+        etag = self.guest_client.get(self.urls['index'])['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                self.urls['index'], HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
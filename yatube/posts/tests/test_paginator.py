@@ -1,6 +1,7 @@
 from math import ceil
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.conf import settings
@@ -33,6 +34,7 @@ class PaginatorViewsTest(TestCase):
             )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_first_last_page_contains(self):
@@ -47,10 +49,43 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(
                     len(response.context['page_obj']), settings.NUM_POSTS
                 )
-                response = self.guest_client.get(
-                    f'{reverse_name}?page={self.page}'
-                )
+                for _ in range(self.page - 1):
+                    cursor = response.context['page_obj'].paginator.next_cursor
+                    response = self.guest_client.get(
+                        f'{reverse_name}?cursor={cursor}'
+                    )
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), self.last_page_posts)
+                self.assertEqual(page_obj.number, self.page)
+                self.assertFalse(page_obj.has_next())
+
+    def test_cursor_pages_do_not_overlap(self):
+        url = reverse('posts:index')
+        first = self.guest_client.get(url).context['page_obj']
+        cursor = first.paginator.next_cursor
+        second = self.guest_client.get(f'{url}?cursor={cursor}').context[
+            'page_obj'
+        ]
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(
+            len(first) + len(second), Post.objects.count()
+        )
+        cursor = second.paginator.previous_cursor
+        back = self.guest_client.get(f'{url}?cursor={cursor}').context[
+            'page_obj'
+        ]
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor_shows_first_page(self):
+        url = reverse('posts:index')
+        # Второй курсор — {"v":[null,null],"p":1}.
+        for cursor in ('broken', 'eyJ2IjpbbnVsbCxudWxsXSwicCI6MX0'):
+            with self.subTest(cursor=cursor):
+                cache.clear()
+                response = self.guest_client.get(f'{url}?cursor={cursor}')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['page_obj'].number, 1)
                 self.assertEqual(
-                    len(response.context['page_obj']),
-                    self.last_page_posts
+                    len(response.context['page_obj']), settings.NUM_POSTS
                 )
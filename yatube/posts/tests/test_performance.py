@@ -0,0 +1,205 @@
+import json
+import os
+import random
+import time
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from faker import Faker
+from mixer.backend.django import mixer
+
+from .. import counters, feed, ranking, search, suggestions, threads
+from ..models import Comment, Follow, Group, Post
+from ..urls import app_name, urlpatterns
+
+User = get_user_model()
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'budgets.json')
+
+# Объём данных: small гоняется в CI, full — перед выкладкой.
+SCALES = {
+    'small': {
+        'users': 60, 'groups': 5, 'posts': 2000,
+        'follows': 400, 'comments': 3000,
+    },
+    'full': {
+        'users': 3000, 'groups': 50, 'posts': 100000,
+        'follows': 40000, 'comments': 200000,
+    },
+}
+SCALE = os.getenv('YATUBE_PERF_SCALE', 'small')
+# Записать измерения в budgets.json вместо проверки.
+RECORD = os.getenv('YATUBE_PERF_RECORD') == '1'
+# Проверять не только число запросов, но и время.
+STRICT = os.getenv('YATUBE_PERF_STRICT') == '1'
+# Запас, с которым записываются бюджеты по времени, и их минимум в мс.
+TIME_HEADROOM = 3
+TIME_FLOOR = 5
+BATCH_SIZE = 500
+
+
+class QueryTimer:
+    """Обёртка `execute_wrapper`, считающая запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def popular(population, size):
+    """Выборка со степенным распределением: первые элементы популярнее."""
+    weights = [1 / (rank + 1) for rank in range(len(population))]
+    return random.choices(population, weights=weights, k=size)
+
+
+class PerformanceBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        random.seed(2022)
+        fake = Faker('ru_RU')
+        Faker.seed(2022)
+        volume = SCALES[SCALE]
+        users = mixer.cycle(volume['users']).blend(
+            User, username=mixer.sequence('perf_user{0}')
+        )
+        groups = mixer.cycle(volume['groups']).blend(
+            Group, slug=mixer.sequence('perf-group-{0}')
+        )
+        Post.objects.bulk_create(
+            (
+                Post(
+                    author=author,
+                    group=random.choice(groups + [None]),
+                    text=fake.text(300),
+                )
+                for author in popular(users, volume['posts'])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        pairs = {
+            (reader.id, author.id)
+            for reader, author in zip(
+                random.choices(users, k=volume['follows']),
+                popular(users, volume['follows']),
+            )
+            if reader != author
+        }
+        Follow.objects.bulk_create(
+            [Follow(user_id=user, author_id=author) for user, author in pairs],
+            batch_size=BATCH_SIZE,
+        )
+        post_ids = list(Post.objects.values_list('id', flat=True))
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    post_id=post_id,
+                    author=random.choice(users),
+                    text=fake.sentence(),
+                )
+                for post_id in popular(post_ids, volume['comments'])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        counters.recount_authors()
+        counters.recount_comments()
+        threads.fill_paths()
+        ranking.rescore(Post.objects.all())
+        feed.rebuild_feeds()
+        suggestions.rebuild()
+        search.rebuild_index()
+        cls.reader = users[0]
+        cls.author = users[1]
+        cls.group = groups[0]
+        cls.post = Post.objects.filter(author=cls.reader).first()
+        cls.comment = Comment.objects.filter(post=cls.post).first() or (
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=fake.sentence()
+            )
+        )
+        with open(BUDGETS_PATH, encoding='utf-8') as budgets:
+            cls.budgets = json.load(budgets)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def sample_kwargs(self):
+        return {
+            'group_list': {'slug': self.group.slug},
+            'profile': {'username': self.author.username},
+            'profile_follow': {'username': self.author.username},
+            'profile_unfollow': {'username': self.author.username},
+            'post_detail': {'post_id': self.post.id},
+            'post_edit': {'post_id': self.post.id},
+            'add_comment': {'post_id': self.post.id},
+            'comments': {'post_id': self.post.id},
+            'react': {'post_id': self.post.id},
+            'react_comment': {
+                'post_id': self.post.id, 'comment_id': self.comment.id,
+            },
+        }
+
+    def measure(self, url):
+        cache.clear()
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = self.authorized_client.get(url)
+            total = time.perf_counter() - started
+        return response, {
+            'queries': timer.count,
+            'sql_ms': round(timer.seconds * 1000, 1),
+            'render_ms': round((total - timer.seconds) * 1000, 1),
+        }
+
+    def test_every_url_has_budget(self):
+        for pattern in urlpatterns:
+            name = f'{app_name}:{pattern.name}'
+            with self.subTest(name=name):
+                self.assertIn(name, self.budgets)
+
+    def test_views_within_budget(self):
+        kwargs = self.sample_kwargs()
+        queries = {'search': {'q': self.post.text.split()[0]}}
+        measured = {}
+        for pattern in urlpatterns:
+            name = f'{app_name}:{pattern.name}'
+            url = reverse(name, kwargs=kwargs.get(pattern.name))
+            if pattern.name in queries:
+                url += '?' + urlencode(queries[pattern.name])
+            response, measured[name] = self.measure(url)
+            self.assertLess(response.status_code, 400, url)
+        if RECORD:
+            for result in measured.values():
+                for metric in ('sql_ms', 'render_ms'):
+                    result[metric] = max(
+                        round(result[metric] * TIME_HEADROOM, 1), TIME_FLOOR
+                    )
+            with open(BUDGETS_PATH, 'w', encoding='utf-8') as budgets:
+                json.dump(measured, budgets, indent=2, sort_keys=True)
+                budgets.write('\n')
+            return
+        checked = ('queries', 'sql_ms', 'render_ms') if STRICT else (
+            'queries',
+        )
+        for name, result in measured.items():
+            for metric in checked:
+                with self.subTest(name=name, metric=metric):
+                    self.assertLessEqual(
+                        result[metric],
+                        self.budgets[name][metric],
+                        f'{name}: {result} при бюджете {self.budgets[name]}',
+                    )
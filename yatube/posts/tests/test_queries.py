@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов на странице не должно зависеть от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='budget_reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='budget_group',
+            description='Описание',
+        )
+        authors = [
+            User.objects.create_user(username=f'budget_author{number}')
+            for number in range(3)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+            for number in range(4):
+                post = Post.objects.create(
+                    author=author, group=cls.group, text=f'Пост {number}'
+                )
+                for commenter in authors:
+                    Comment.objects.create(
+                        post=post, author=commenter, text='Коммент'
+                    )
+        cls.author = authors[0]
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_view_query_budget(self):
+        # Сессия берётся из кэша, пользователь авторизованного клиента —
+        # ещё один запрос, его реакции на постах страницы и рекомендации
+        # «кого почитать» — ещё по одному.
+        budgets = [
+            (self.guest_client, reverse('posts:index'), 1),
+            (self.guest_client, reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ), 1),
+            (self.guest_client, reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ), 1),
+            (self.guest_client, reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}
+            ), 2),
+            (self.authorized_client, reverse('posts:follow_index'), 5),
+            (self.authorized_client, reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ), 5),
+        ]
+        for client, url, queries in budgets:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import reactions
+from ..models import Comment, Follow, Post
+from ..ranking import score
+
+User = get_user_model()
+
+
+class RankingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ranking_author')
+        cls.reader = User.objects.create_user(username='ranking_reader')
+        cls.old = Post.objects.create(author=cls.author, text='Старый')
+        cls.new = Post.objects.create(author=cls.author, text='Новый')
+        # Старый пост опубликован на полдня раньше.
+        Post.objects.filter(id=cls.old.id).update(
+            pub_date=cls.new.pub_date - timedelta(hours=6)
+        )
+        call_command('rescore_posts', stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def popular(self):
+        response = self.guest_client.get(reverse('posts:popular'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_score(self):
+        now = timezone.now()
+        self.assertGreater(
+            score(now, 1, 0, 0), score(now - timedelta(hours=1), 1, 0, 0)
+        )
+        self.assertGreater(score(now, 5, 3, 100), score(now, 5, 3, 0))
+        # Десятикратная вовлечённость стоит POPULAR_DECAY_HOURS свежести.
+        self.assertAlmostEqual(
+            score(now - timedelta(hours=12), 9, 1, 0) - score(now, 0, 1, 0),
+            0,
+        )
+
+    def test_fresh_post_first(self):
+        self.assertEqual(self.popular(), ['Новый', 'Старый'])
+
+    def test_comments_raise_post(self):
+        for number in range(20):
+            Comment.objects.create(
+                post=self.old, author=self.reader, text=f'Коммент {number}'
+            )
+        self.assertEqual(self.popular(), ['Старый', 'Новый'])
+        Comment.objects.filter(post=self.old).delete()
+        self.assertEqual(self.popular(), ['Новый', 'Старый'])
+
+    @override_settings(REACTION_FLUSH_INTERVAL=0)
+    def test_reactions_raise_post(self):
+        before = Post.objects.get(id=self.new.id).score
+        reactions.react(self.reader, self.new, 'like')
+        self.assertGreater(Post.objects.get(id=self.new.id).score, before)
+
+    def test_followers_raise_recent_posts(self):
+        Post.objects.filter(id=self.old.id).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        before = dict(Post.objects.values_list('id', 'score'))
+        Follow.objects.create(user=self.reader, author=self.author)
+        after = dict(Post.objects.values_list('id', 'score'))
+        self.assertGreater(after[self.new.id], before[self.new.id])
+        # Старые посты догонит периодический пересчёт.
+        self.assertEqual(after[self.old.id], before[self.old.id])
+
+    def test_rescore_command_fixes_drift(self):
+        Post.objects.filter(id=self.old.id).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        Post.objects.update(score=0)
+        out = StringIO()
+        call_command('rescore_posts', '--days', '1', stdout=out)
+        self.assertIn('очки постов: 1', out.getvalue())
+        call_command('rescore_posts', stdout=out)
+        self.assertEqual(self.popular(), ['Новый', 'Старый'])
+
+    def test_popular_page_is_one_query(self):
+        self.guest_client.get(reverse('posts:popular'))
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.guest_client.get(reverse('posts:popular'))
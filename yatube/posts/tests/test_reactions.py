@@ -0,0 +1,157 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import reactions
+from ..counters import recount_reactions
+from ..models import Comment, Post, PostReaction
+
+User = get_user_model()
+
+
+@override_settings(REACTION_FLUSH_INTERVAL=0)
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='reaction_author')
+        cls.reader = User.objects.create_user(username='reaction_reader')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        cls.post = cls.posts[-1]
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.author, text='Коммент'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def count(self, target):
+        target.refresh_from_db(fields=['reaction_count'])
+        return target.reaction_count
+
+    def test_one_reaction_per_user(self):
+        self.assertTrue(reactions.react(self.reader, self.post, 'like'))
+        self.assertFalse(reactions.react(self.reader, self.post, 'wow'))
+        reactions.react(self.author, self.post, 'like')
+        self.assertEqual(self.count(self.post), 2)
+        self.assertEqual(
+            PostReaction.objects.get(user=self.reader).kind, 'wow'
+        )
+        self.assertTrue(reactions.unreact(self.reader, self.post))
+        self.assertFalse(reactions.unreact(self.reader, self.post))
+        self.assertEqual(self.count(self.post), 1)
+        with self.assertRaises(ValueError):
+            reactions.react(self.reader, self.post, 'angry')
+
+    @override_settings(REACTION_FLUSH_INTERVAL=60)
+    def test_increments_are_buffered(self):
+        buffer = reactions.buffer
+        # Отсчёт интервала — с этой записи.
+        buffer.flush()
+        for user in (self.reader, self.author):
+            for post in self.posts:
+                reactions.react(user, post, 'like')
+        reactions.react(self.reader, self.comment, 'laugh')
+        self.assertEqual(self.count(self.post), 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(buffer.flush(), 4)
+        updates = [
+            query for query in queries.captured_queries
+            if 'SET "reaction_count"' in query['sql']
+        ]
+        # Одна строка UPDATE на таблицу, сколько бы объектов ни было.
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            [self.count(post) for post in self.posts], [2, 2, 2]
+        )
+        self.assertEqual(self.count(self.comment), 1)
+        self.assertIsNone(buffer.timer)
+
+    def test_mark_reacted_in_one_query(self):
+        reactions.react(self.reader, self.posts[0], 'love')
+        with self.assertNumQueries(1):
+            marked = reactions.mark_reacted(self.reader, self.posts)
+        self.assertEqual(
+            [post.my_reaction for post in marked], ['love', None, None]
+        )
+        with self.assertNumQueries(0):
+            reactions.mark_reacted(AnonymousUser(), self.posts)
+
+    def test_react_view(self):
+        url = reverse('posts:react', kwargs={'post_id': self.post.id})
+        index = reverse('posts:index')
+        response = self.authorized_client.post(
+            url, {'kind': 'like', 'next': index}
+        )
+        self.assertRedirects(response, index)
+        response = self.authorized_client.get(index)
+        self.assertEqual(
+            response.context['page_obj'].object_list[0].my_reaction, 'like'
+        )
+        self.assertContains(response, 'Реакций: 1')
+        response = self.authorized_client.post(
+            url, {'kind': '', 'next': 'https://example.com/'}
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        self.assertEqual(self.count(self.post), 0)
+
+    def test_index_buttons_are_not_shared(self):
+        index = reverse('posts:index')
+        url = reverse('posts:react', kwargs={'post_id': self.post.id})
+        response = self.client.get(index)
+        self.assertNotContains(response, 'name="kind"')
+        for user in (self.reader, self.author):
+            client = Client(enforce_csrf_checks=True)
+            client.force_login(user)
+            response = client.get(index)
+            token = re.search(
+                r'name="csrfmiddlewaretoken" value="([^"]+)"',
+                response.content.decode(),
+            )
+            self.assertIsNotNone(token, user)
+            response = client.post(url, {
+                'kind': 'like', 'csrfmiddlewaretoken': token.group(1),
+            })
+            self.assertEqual(response.status_code, 302, user)
+        self.assertEqual(
+            PostReaction.objects.filter(post=self.post).count(), 2
+        )
+
+    def test_comment_reaction_changes_page_etag(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        etag = self.authorized_client.get(url)['ETag']
+        self.authorized_client.post(
+            reverse('posts:react_comment', kwargs={
+                'post_id': self.post.id, 'comment_id': self.comment.id,
+            }),
+            {'kind': 'sad'},
+        )
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['comments'][0].my_reaction, 'sad'
+        )
+
+    def test_recount(self):
+        reactions.react(self.reader, self.post, 'like')
+        Post.objects.filter(id=self.post.id).update(reaction_count=7)
+        Comment.objects.filter(id=self.comment.id).update(reaction_count=3)
+        self.assertEqual(recount_reactions(), 2)
+        self.assertEqual(self.count(self.post), 1)
+        self.assertEqual(self.count(self.comment), 0)
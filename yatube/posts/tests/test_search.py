@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, SearchTerm
+from ..search import stem, tokenize
+
+User = get_user_model()
+
+
+class TokenizerTests(TestCase):
+    def test_stem(self):
+        words = [
+            ('кошки', 'кошк'),
+            ('кошкам', 'кошк'),
+            ('красивая', 'красив'),
+            ('красивейший', 'красив'),
+            ('ёлки', 'елк'),
+            ('программирование', 'программирован'),
+        ]
+        for word, expected in words:
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_tokenize_drops_stop_words(self):
+        self.assertEqual(
+            tokenize('Кошки и Python на крыше'),
+            ['кошк', 'python', 'крыш'],
+        )
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='search_author')
+        cls.both = Post.objects.create(
+            author=cls.user, text='Рыжая кошка спит на крыше'
+        )
+        cls.cat = Post.objects.create(
+            author=cls.user, text='Кошки, кошки и ещё раз кошки'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Пост про собак'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': query}
+        )
+        return list(response.context['page_obj'])
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search('кошками'), [self.cat, self.both])
+        self.assertEqual(self.search('кошка на крышах'), [
+            self.both, self.cat
+        ])
+        self.assertEqual(self.search('котлеты'), [])
+
+    def test_index_follows_post_changes(self):
+        self.other.text = 'Теперь про кошку'
+        self.other.save()
+        self.assertIn(self.other, self.search('кошка'))
+        self.assertFalse(self.search('собак'))
+        self.other.delete()
+        self.assertFalse(SearchTerm.objects.filter(post_id=self.other.id))
@@ -0,0 +1,150 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import suggestions
+from ..models import Follow, Suggestion
+
+User = get_user_model()
+
+
+class SuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = ('reader', 'first', 'second', 'friend', 'similar', 'fan')
+        users = {
+            name: User.objects.create_user(username=f'suggest_{name}')
+            for name in names
+        }
+        for attr, user in users.items():
+            setattr(cls, attr, user)
+        # Оба автора читателя подписаны на friend, а fan читает first
+        # вместе с similar. Подписка пересчитывает рекомендации только
+        # подписчика, поэтому читатель подписывается последним.
+        for user, author in (
+            ('first', 'friend'), ('second', 'friend'),
+            ('fan', 'first'), ('fan', 'similar'),
+            ('reader', 'first'), ('reader', 'second'),
+        ):
+            Follow.objects.create(user=users[user], author=users[author])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def stored(self, user):
+        return list(Suggestion.objects.filter(user=user).order_by(
+            '-score', 'author'
+        ).values_list('author__username', 'mutual'))
+
+    def test_refreshed_on_follow(self):
+        self.assertEqual(
+            self.stored(self.reader),
+            [('suggest_friend', 2), ('suggest_similar', 0)],
+        )
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'suggest_friend'}
+        ))
+        self.assertEqual(self.stored(self.reader), [('suggest_similar', 0)])
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'suggest_friend'}
+        ))
+        self.assertEqual(self.stored(self.reader)[0], ('suggest_friend', 2))
+
+    def test_refresh_is_bounded(self):
+        # similar попадает в рекомендации только через читателя first.
+        for bound in (
+            {'FEED_FANOUT_LIMIT': 1}, {'SUGGESTION_REFRESH_READERS': 0},
+        ):
+            with self.subTest(**bound), self.settings(**bound):
+                suggestions.refresh(self.reader.id)
+                self.assertEqual(
+                    self.stored(self.reader), [('suggest_friend', 2)]
+                )
+
+    def test_rebuild_matches_refresh(self):
+        users = User.objects.all()
+        with mock.patch.object(suggestions, 'sparse', None):
+            count = suggestions.rebuild()
+        rebuilt = {user: self.stored(user) for user in users}
+        self.assertEqual(count, sum(map(len, rebuilt.values())))
+        # fan отстал: читатель подписался на first после него.
+        self.assertEqual(rebuilt[self.fan], [
+            ('suggest_friend', 1), ('suggest_second', 0),
+        ])
+        for user in users:
+            suggestions.refresh(user.id)
+        self.assertEqual(
+            {user: self.stored(user) for user in users}, rebuilt
+        )
+
+    def test_rebuild_many(self):
+        # SQLite не принимает в одной вставке больше 500 строк.
+        User.objects.bulk_create([
+            User(username=f'suggest_many{number}') for number in range(150)
+        ])
+        readers = list(User.objects.filter(username__startswith='suggest_m'))
+        Follow.objects.bulk_create([
+            Follow(user=reader, author=readers[(index + step) % 150])
+            for index, reader in enumerate(readers)
+            for step in range(1, 4)
+        ])
+        with mock.patch.object(suggestions, 'sparse', None):
+            count = suggestions.rebuild()
+        self.assertGreater(count, 500)
+        self.assertEqual(Suggestion.objects.count(), count)
+
+    @skipUnless(suggestions.sparse, 'Нужны NumPy и SciPy')
+    def test_matrix_matches_graph(self):
+        edges = list(Follow.objects.values_list('user_id', 'author_id'))
+        graph = suggestions._rank_graph(edges, 5)
+        matrix = suggestions._rank_matrix(edges, 5)
+        self.assertEqual(graph.keys(), matrix.keys())
+        for user_id, ranked in graph.items():
+            self.assertEqual(
+                [(author, mutual) for author, _, mutual in ranked],
+                [(author, mutual) for author, _, mutual in matrix[user_id]],
+            )
+            for (_, expected, _), (_, score, _) in zip(
+                ranked, matrix[user_id]
+            ):
+                self.assertAlmostEqual(score, expected)
+
+    def test_pages_show_suggestions(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.friend, self.similar],
+        )
+        self.assertContains(response, 'Кого почитать')
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': 'suggest_friend'}
+        ))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.similar],
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(suggestions.for_user(AnonymousUser()), [])
+
+    @skipUnless(
+        connection.vendor == 'sqlite', 'План читается в формате SQLite'
+    )
+    def test_read_uses_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            suggestions.for_user(self.reader, exclude=self.friend)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN ' + queries.captured_queries[0]['sql']
+            )
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('suggestion_user_score_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
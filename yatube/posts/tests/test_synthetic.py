@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+from io import StringIO
+from statistics import median
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase, TestCase, override_settings
+
+from ..loadtest import percentile
+from ..models import AuthorStats, Comment, Follow, Group, MediaFile, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def generate(**options):
+    call_command(
+        'generate_data', users=40, groups=3, posts=120, follows=200,
+        comments=200, stdout=StringIO(), **options
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateDataTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_generated_graph(self):
+        generate(images=0.5, seed=1)
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 120)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertEqual(Follow.objects.count(), 200)
+        followers = sorted(
+            AuthorStats.objects.values_list('follower_count', flat=True),
+            reverse=True,
+        )
+        # Степенной закон: у самых популярных авторов подписчиков в разы
+        # больше, чем у типичного.
+        self.assertGreater(followers[0], 5 * max(median(followers), 1))
+        self.assertEqual(
+            Post.objects.get(id=Post.objects.order_by('id')[0].id)
+            .comment_count,
+            Comment.objects.filter(
+                post=Post.objects.order_by('id')[0]
+            ).count(),
+        )
+        # Картинки общие у многих постов, файлов немного.
+        self.assertLessEqual(MediaFile.objects.count(), 20)
+        self.assertGreater(Post.objects.exclude(image='').count(), 30)
+
+    def test_generation_is_repeatable(self):
+        generate(images=0, seed=7)
+        texts = list(Post.objects.order_by('id').values_list('text'))
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        generate(images=0, seed=7)
+        self.assertEqual(
+            list(Post.objects.order_by('id').values_list('text')), texts
+        )
+
+
+class LoadTestTests(LiveServerTestCase):
+    def test_report_per_url_name(self):
+        generate(images=0, password='load-pass')
+        expected = {
+            'anonymous': ('posts:index', 'posts:post_detail'),
+            'feed': ('users:login', 'posts:follow_index'),
+        }
+        for scenario, names in expected.items():
+            out = StringIO()
+            call_command(
+                'load_test', base_url=self.live_server_url, duration=0.3,
+                concurrency=1, password='load-pass', scenario=[scenario],
+                stdout=out,
+            )
+            for name in names:
+                with self.subTest(scenario=scenario, name=name):
+                    self.assertIn(name, out.getvalue())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
@@ -0,0 +1,175 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..counters import recount_replies
+from ..models import Comment, Post
+from ..threads import fill_paths, replies
+
+User = get_user_model()
+
+
+@override_settings(COMMENT_DEPTH=2)
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='thread_author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.first = cls.comment('Первый')
+        cls.answer = cls.comment('Ответ', cls.first)
+        cls.deep = cls.comment('Глубже', cls.answer)
+        cls.hidden = cls.comment('Свёрнутый', cls.deep)
+        cls.second = cls.comment('Второй')
+
+    @classmethod
+    def comment(cls, text, parent=None):
+        return Comment.objects.create(
+            post=cls.post, author=cls.author, text=text, parent=parent
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_paths_and_counters(self):
+        self.hidden.refresh_from_db()
+        self.assertEqual(self.hidden.depth, 3)
+        self.assertEqual(
+            self.hidden.path,
+            ''.join(Comment.segment(comment.id) for comment in (
+                self.first, self.answer, self.deep, self.hidden
+            )),
+        )
+        self.assertEqual(
+            list(Comment.objects.order_by('path').values_list(
+                'text', 'replies'
+            )),
+            [('Первый', 3), ('Ответ', 2), ('Глубже', 1), ('Свёрнутый', 0),
+             ('Второй', 0)],
+        )
+        Comment.objects.get(id=self.deep.id).delete()
+        self.assertEqual(
+            dict(Comment.objects.values_list('text', 'replies')),
+            {'Первый': 1, 'Ответ': 0, 'Второй': 0},
+        )
+
+    def test_depth_is_limited(self):
+        parent = self.second
+        for number in range(Comment.MAX_DEPTH + 2):
+            parent = self.comment(f'Уровень {number}', parent)
+        self.assertEqual(parent.depth, Comment.MAX_DEPTH)
+        self.assertEqual(parent.parent.depth, Comment.MAX_DEPTH - 1)
+
+    def test_post_page_shows_visible_replies(self):
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        first, second = response.context['comments']
+        self.assertEqual(
+            [reply.text for reply in first.thread], ['Ответ', 'Глубже']
+        )
+        self.assertEqual(second.thread, [])
+        self.assertEqual(first.thread[-1].hidden_replies, 1)
+        self.assertNotContains(response, 'Свёрнутый')
+        self.assertContains(response, f'?thread={self.deep.id}')
+
+    def test_collapsed_thread_fragment(self):
+        url = reverse('posts:comments', kwargs={'post_id': self.post.id})
+        response = self.authorized_client.get(url, {'thread': self.deep.id})
+        self.assertEqual(
+            [reply.text for reply in response.context['thread']],
+            ['Свёрнутый'],
+        )
+        self.assertNotContains(response, '<html')
+        for thread in (self.second.id + 1000, 'ветка'):
+            response = self.authorized_client.get(url, {'thread': thread})
+            self.assertEqual(response.status_code, 404)
+
+    def test_replies_in_one_query(self):
+        roots = list(Comment.objects.filter(depth=0).order_by('path'))
+        with self.assertNumQueries(1):
+            threads, cut = replies(Comment.objects.all(), roots, 5, 10)
+        self.assertIsNone(cut)
+        self.assertEqual(
+            [reply.text for reply in threads[self.first.path]],
+            ['Ответ', 'Глубже', 'Свёрнутый'],
+        )
+        with self.assertNumQueries(0):
+            replies(Comment.objects.all(), [self.second], 5, 10)
+
+    @override_settings(MAX_COMMENTS=1)
+    def test_replies_are_capped(self):
+        reply = self.comment('Ответ второму', self.second)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        first, second = response.context['comments']
+        self.assertEqual([item.text for item in first.thread], ['Ответ'])
+        self.assertEqual(
+            first.more, {'cursor': self.answer.path, 'count': 2}
+        )
+        self.assertEqual(second.thread, [])
+        self.assertEqual(second.more, {'cursor': None, 'count': 1})
+        self.assertNotContains(response, reply.text)
+        self.assertContains(
+            response, f'?thread={self.first.id}&amp;cursor={self.answer.path}'
+        )
+        url = reverse('posts:comments', kwargs={'post_id': self.post.id})
+        response = self.authorized_client.get(
+            url, {'thread': self.first.id, 'cursor': self.answer.path}
+        )
+        self.assertEqual(
+            [item.text for item in response.context['thread']], ['Глубже']
+        )
+        self.assertIsNone(response.context['parent'].more)
+        response = self.authorized_client.get(
+            url, {'thread': self.second.id, 'limit': 50}
+        )
+        self.assertEqual(
+            [item.text for item in response.context['thread']],
+            [reply.text],
+        )
+
+    def test_reply_form(self):
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        self.authorized_client.post(
+            url, {'text': 'Ответ второму', 'parent': self.second.id}
+        )
+        reply = Comment.objects.get(text='Ответ второму')
+        self.assertEqual(reply.parent, self.second)
+        other = Post.objects.create(author=self.author, text='Другой')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': other.id}),
+            {'text': 'Чужая ветка', 'parent': self.second.id},
+        )
+        self.assertFalse(Comment.objects.filter(text='Чужая ветка').exists())
+
+    def test_fill_paths_and_recount(self):
+        Comment.objects.update(path='', replies=0)
+        self.assertEqual(fill_paths(), 5)
+        self.hidden.refresh_from_db()
+        self.assertEqual(len(self.hidden.path), Comment.PATH_STEP * 4)
+        self.assertEqual(recount_replies(), 3)
+        self.assertEqual(
+            Comment.objects.get(id=self.first.id).replies, 3
+        )
+
+    @skipUnless(
+        connection.vendor == 'sqlite', 'План читается в формате SQLite'
+    )
+    def test_replies_use_path_index(self):
+        first = Comment.objects.get(id=self.first.id)
+        with CaptureQueriesContext(connection) as queries:
+            replies(Comment.objects.filter(post=self.post), [first], 2, 10)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN ' + queries.captured_queries[0]['sql']
+            )
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('comment_post_path_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
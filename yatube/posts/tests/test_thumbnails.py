@@ -0,0 +1,137 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import images
+from ..models import Post, ThumbnailJob
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+PLACEHOLDER = 'bg-light'
+
+
+def uploaded_image(size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'PNG')
+    return SimpleUploadedFile(
+        'photo.png', buffer.getvalue(), content_type='image/png'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='thumb_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=uploaded_image(),
+        )
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+
+    def process(self):
+        call_command(
+            'process_thumbnails', '--once', '--workers=1', stdout=StringIO()
+        )
+
+    def test_post_with_image_is_queued(self):
+        self.assertTrue(ThumbnailJob.objects.filter(post=self.post).exists())
+        Post.objects.create(author=self.user, text='Без картинки')
+        self.assertEqual(ThumbnailJob.objects.count(), 1)
+
+    def test_placeholder_until_thumbnail_ready(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, PLACEHOLDER)
+        self.assertNotContains(response, '<img class="card-img')
+        updated = Post.objects.get(pk=self.post.pk).updated
+        self.process()
+        self.assertFalse(ThumbnailJob.objects.exists())
+        self.assertGreater(Post.objects.get(pk=self.post.pk).updated, updated)
+        for url in (self.url, reverse('posts:index')):
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.client.get(url)
+                self.assertContains(response, '<img class="card-img')
+                self.assertNotContains(response, PLACEHOLDER)
+
+    def test_edit_during_processing_requeues(self):
+        job = ThumbnailJob.objects.get(post=self.post)
+        self.post.text = 'Новая картинка'
+        self.post.save()
+        ThumbnailJob.objects.filter(
+            pk=job.pk, requested=job.requested
+        ).delete()
+        self.assertTrue(ThumbnailJob.objects.filter(post=self.post).exists())
+
+    def test_broken_image_gives_up(self):
+        Post.objects.filter(pk=self.post.pk).update(image='posts/missing.gif')
+        with self.assertLogs('yatube.thumbnails', 'ERROR'):
+            self.process()
+        job = ThumbnailJob.objects.get(post=self.post)
+        self.assertEqual(job.attempts, settings.THUMBNAIL_JOB_ATTEMPTS)
+
+    def test_variants_in_srcset(self):
+        self.process()
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.variants['source'], post.image.name)
+        self.assertEqual((post.image_width, post.image_height), (1200, 800))
+        response = self.client.get(self.url)
+        self.assertContains(response, 'type="image/webp"')
+        for width in settings.POST_IMAGE_WIDTHS:
+            with self.subTest(width=width):
+                self.assertContains(response, f'/{width}.webp {width}w')
+                self.assertContains(response, f'/{width}.jpg {width}w')
+        variant = post.variants['sources'][0]['srcset'][0][1]
+        with default_storage.open(variant) as file_:
+            self.assertEqual(Image.open(file_).size, (320, 113))
+
+    def test_small_image_is_not_upscaled(self):
+        self.post.image = uploaded_image((500, 500))
+        self.post.save()
+        self.assertIsNone(Post.objects.get(pk=self.post.pk).variants)
+        self.process()
+        response = self.client.get(self.url)
+        self.assertContains(response, '/320.jpg 320w')
+        self.assertNotContains(response, '640w')
+
+    def test_same_file_is_rendered_once(self):
+        self.process()
+        copy = Post.objects.create(
+            author=self.user, text='Репост', image=uploaded_image()
+        )
+        self.assertEqual(copy.image.name, self.post.image.name)
+        with mock.patch.object(
+            images, 'render_variants', wraps=images.render_variants
+        ) as render:
+            self.process()
+        render.assert_not_called()
+        self.assertEqual(
+            Post.objects.get(pk=copy.pk).variants,
+            Post.objects.get(pk=self.post.pk).variants,
+        )
@@ -0,0 +1,109 @@
+"""Ветки комментариев на материализованных путях.
+
+Комментарии страницы — соседи одного уровня, идущие подряд по пути,
+поэтому все их видимые ответы лежат в одном диапазоне путей и
+читаются одним сканом индекса (post, path) уже в порядке обхода.
+Ответы глубже видимого уровня не выбираются: у последнего видимого
+ответа есть счётчик `replies`, по которому шаблон показывает
+«ещё N ответов». Ответов на запрос выбирается не больше
+`MAX_COMMENTS`: что не поместилось, тоже сворачивается, и ветка
+дочитывается по курсору — пути последнего показанного ответа.
+"""
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat, LPad
+
+from .models import Comment
+from .pagination import field_value
+
+# Больше любой цифры: `path + PATH_END` — верхняя граница поддерева.
+PATH_END = '~'
+
+
+def replies(queryset, roots, levels, limit, after=None):
+    """Ответы на `roots` до `levels` уровней ниже, по путям веток.
+
+    `roots` — комментарии одного уровня, идущие подряд в порядке пути
+    (страница веток или один комментарий). Ответов выбирается не больше
+    `limit` на все корни вместе; `after` — путь, после которого
+    продолжить. Возвращает словарь `{путь корня: [ответы в порядке
+    обхода]}` и путь последнего выбранного ответа, если выбраны не все,
+    иначе None. Если ни у кого из корней нет ответов, запроса нет.
+    """
+    roots = [root for root in roots if field_value(root, 'replies')]
+    if not roots or levels < 1:
+        return {}, None
+    paths = sorted(field_value(root, 'path') for root in roots)
+    depth = field_value(roots[0], 'depth')
+    rows = list(queryset.filter(
+        path__gt=max(paths[0], after or ''),
+        path__lt=paths[-1] + PATH_END,
+        depth__gt=depth,
+        depth__lte=depth + levels,
+    ).order_by('path')[:limit + 1])
+    cut = None
+    if len(rows) > limit:
+        del rows[limit:]
+        cut = field_value(rows[-1], 'path')
+    length = Comment.PATH_STEP * (depth + 1)
+    threads = {path: [] for path in paths}
+    for row in rows:
+        thread = threads.get(field_value(row, 'path')[:length])
+        if thread is not None:
+            thread.append(row)
+    return threads, cut
+
+
+def unfinished(roots, cut):
+    """Корни, ответы которых `replies()` выбрал не все.
+
+    Возвращает `{путь корня: курсор}`: у обрезанной ветки курсор —
+    `cut`, у веток за ней, не получивших ни одного ответа, — None.
+    """
+    if cut is None:
+        return {}
+    cursors = {}
+    for root in roots:
+        path = field_value(root, 'path')
+        if not field_value(root, 'replies'):
+            continue
+        if cut.startswith(path):
+            cursors[path] = cut
+        elif path > cut:
+            cursors[path] = None
+    return cursors
+
+
+def hidden_replies(comment, depth):
+    """Сколько ответов свёрнуто под `comment`, если глубина `depth`
+    последняя видимая."""
+    if field_value(comment, 'depth') < depth:
+        return 0
+    return field_value(comment, 'replies')
+
+
+def _segment(field):
+    return LPad(Cast(field, CharField()), Comment.PATH_STEP, Value('0'))
+
+
+def fill_paths():
+    """Проставить путь и глубину комментариям, загруженным без них.
+
+    Корни получают путь из своего id, затем уровень за уровнем —
+    ответы, чьи родители путь уже получили. Вернуть число строк.
+    """
+    filled = Comment.objects.filter(path='', parent=None).update(
+        path=_segment('id'), depth=0
+    )
+    while True:
+        parents = Comment.objects.filter(pk=OuterRef('parent_id'))
+        updated = Comment.objects.filter(
+            path='', parent__isnull=False
+        ).exclude(parent__path='').update(
+            path=Concat(
+                Subquery(parents.values('path')[:1]), _segment('id')
+            ),
+            depth=Subquery(parents.values('depth')[:1]) + 1,
+        )
+        if not updated:
+            return filled
+        filled += updated
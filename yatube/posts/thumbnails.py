@@ -0,0 +1,65 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+Сохранение поста с картинкой ставит его в очередь `ThumbnailJob`, а
+`manage.py process_thumbnails` в пуле потоков заранее нарезает все
+варианты картинки (см. `posts.images`). Страница картинки не
+обрабатывает: пока задача не выполнена, вместо неё показывается заглушка.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .images import update_variants
+from .models import Post, ThumbnailJob
+
+logger = logging.getLogger('yatube.thumbnails')
+
+
+def enqueue(post):
+    # Повторное сохранение сбрасывает задачу, даже если её уже выполняют:
+    # воркер удалит её, только если `requested` не изменилось.
+    ThumbnailJob.objects.update_or_create(
+        post=post, defaults={'claimed': None, 'attempts': 0}
+    )
+
+
+def claim(limit):
+    """Взять в работу до `limit` задач, включая брошенные воркерами."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.THUMBNAIL_JOB_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            ThumbnailJob.objects.select_for_update(skip_locked=True).filter(
+                Q(claimed__isnull=True) | Q(claimed__lt=stale),
+                attempts__lt=settings.THUMBNAIL_JOB_ATTEMPTS,
+            )[:limit]
+        )
+        ThumbnailJob.objects.filter(
+            pk__in=[job.pk for job in jobs]
+        ).update(claimed=now)
+    return jobs
+
+
+def process(job):
+    """Выполнить задачу; неудачная вернётся в очередь до исчерпания попыток."""
+    try:
+        post = Post.objects.only(
+            'id', 'image', 'image_variants', 'image_width'
+        ).get(pk=job.post_id)
+        if post.image:
+            update_variants(post)
+    except Post.DoesNotExist:
+        return True
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры поста %s',
+                         job.post_id)
+        ThumbnailJob.objects.filter(
+            pk=job.pk, requested=job.requested
+        ).update(attempts=F('attempts') + 1, claimed=None)
+        return False
+    ThumbnailJob.objects.filter(pk=job.pk, requested=job.requested).delete()
+    return True
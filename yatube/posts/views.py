@@ -1,84 +1,339 @@
-from django.core.paginator import Paginator
+from urllib.parse import urlencode
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from django.utils.http import is_safe_url
+
+from .models import Comment, Post, Group, User, Follow
+from .forms import PostForm, CommentForm, ReplyForm
+from .conditional import (
+    author_state, page_etag, page_state, post_state,
+    render_conditional, suggestions_state,
+)
+from .feed import follow_page
+from .page_cache import (
+    ALL, FEED, anonymous_page_cache, author_tag, group_tag, versions,
+)
+from .pagination import CursorPaginator
+from .ranking import POPULAR_ORDERING
+from . import reactions, suggestions
+from .search import search_page
+from .threads import hidden_replies, replies, unfinished
+
+
+def paginator(request, post_list, ordering=('-pub_date', '-id')):
+    paginator = CursorPaginator(post_list, settings.NUM_POSTS, ordering)
+    page = paginator.get_page(request.GET.get('cursor'))
+    reactions.mark_reacted(request.user, page.object_list)
+    return page
 
-from .models import Post, Group, User, Follow
-from .forms import PostForm, CommentForm
 
+def _fragment_key(request, page):
+    """Ключ кэша фрагмента ленты сверх курсора.
 
-def paginator(request, post_list):
-    paginator = Paginator(post_list, settings.NUM_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+    У вошедших во фрагменте кнопки реакций с их токеном CSRF, поэтому
+    фрагмент у каждого свой и меняется вместе с cookie токена. Анонимам
+    фрагмент общий, но с версией ленты: иначе страница, собранная после
+    нового поста, взяла бы старый фрагмент и легла бы в кэш страниц
+    под новой версией.
+    """
+    if not request.user.is_authenticated:
+        return versions([ALL, FEED])
+    return (
+        request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        reactions.page_key(page.object_list),
+    )
 
 
+@anonymous_page_cache(FEED)
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
+    post_list = Post.objects.for_feed()
     title = 'Последние обновления на сайте'
+    page = paginator(request, post_list)
     context = {
         'title': title,
-        'page_obj': paginator(request, post_list),
+        'page_obj': page,
+        'fragment_key': _fragment_key(request, page),
     }
-    return render(request, 'posts/index.html', context)
+    return render_conditional(
+        request,
+        'posts/index.html',
+        context,
+        page_etag(request, page_state(page)),
+    )
+
+
+@anonymous_page_cache(FEED)
+def popular(request):
+    """Посты по очкам популярности, см. posts.ranking."""
+    post_list = Post.objects.for_feed()
+    title = 'Популярное'
+    page = paginator(request, post_list, POPULAR_ORDERING)
+    context = {
+        'title': title,
+        'page_obj': page,
+    }
+    return render_conditional(
+        request,
+        'posts/popular.html',
+        context,
+        page_etag(request, page_state(page)),
+    )
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
     title = 'Последние обновления на сайте'
+    page = follow_page(request.user, request.GET.get('cursor'))
+    reactions.mark_reacted(request.user, page.object_list)
+    suggested = suggestions.for_user(request.user)
     context = {
         'title': title,
-        'page_obj': paginator(request, post_list),
+        'page_obj': page,
+        'suggestions': suggested,
     }
-    return render(request, 'posts/follow.html', context)
+    return render_conditional(
+        request,
+        'posts/follow.html',
+        context,
+        page_etag(request, page_state(page), suggestions_state(suggested)),
+    )
 
 
+@anonymous_page_cache(group_tag('{slug}'))
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    post_list = Post.objects.for_feed().filter(group__slug=slug)
+    page = paginator(request, post_list)
+    # Группа приходит вместе с постами; отдельный запрос — только для
+    # пустой страницы.
+    group = page.object_list[0].group if page.object_list else (
+        get_object_or_404(Group, slug=slug)
+    )
     context = {
         'group': group,
-        'page_obj': paginator(request, post_list),
+        'page_obj': page,
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_conditional(
+        request,
+        'posts/group_list.html',
+        context,
+        page_etag(
+            request, group.title, group.description, page_state(page)
+        ),
+    )
 
 
+@anonymous_page_cache(author_tag('{username}'))
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    post_list = Post.objects.for_feed().filter(author__username=username)
+    page = paginator(request, post_list)
+    author = page.object_list[0].author if page.object_list else (
+        get_object_or_404(
+            User.objects.select_related('stats'), username=username
+        )
+    )
     following = (
         request.user.is_authenticated
         and request.user.follower.filter(author=author).exists()
     )
-    post_list = author.posts.select_related('group')
+    suggested = suggestions.for_user(request.user, exclude=author)
     context = {
         'author': author,
-        'page_obj': paginator(request, post_list),
+        'page_obj': page,
         'following': following,
+        'suggestions': suggested,
+    }
+    return render_conditional(
+        request,
+        'posts/profile.html',
+        context,
+        page_etag(
+            request, author_state(author), following, page_state(page),
+            suggestions_state(suggested),
+        ),
+    )
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page = search_page(query, request.GET.get('page'))
+    reactions.mark_reacted(request.user, page.object_list)
+    context = {
+        'query': query,
+        'page_obj': page,
+        'page_query': urlencode({'q': query}) + '&',
     }
-    return render(request, 'posts/profile.html', context)
+    return render(request, 'posts/search.html', context)
+
+
+def _thread_queryset(post_id):
+    return Comment.objects.filter(post_id=post_id).select_related('author')
+
+
+def _attach_replies(post_id, roots, limit=None, after=None):
+    """Проставить корням `thread` и вернуть все показанные комментарии.
+
+    Ответов не больше `limit` (по умолчанию `MAX_COMMENTS`); у корня,
+    чьи ответы показаны не все, `more` — курсор продолжения и, если
+    его можно посчитать, число оставшихся.
+    """
+    depth = settings.COMMENT_DEPTH
+    threads, cut = replies(
+        _thread_queryset(post_id), roots, depth,
+        limit or settings.MAX_COMMENTS, after,
+    )
+    cursors = unfinished(roots, cut)
+    shown = []
+    for root in roots:
+        root.thread = threads.get(root.path, [])
+        shown += [root, *root.thread]
+        for reply in root.thread:
+            reply.hidden_replies = hidden_replies(
+                reply, root.depth + depth
+            )
+        root.more = None
+        if root.path in cursors:
+            # Продолжение не знает, сколько показано до курсора.
+            count = None if after else root.replies - sum(
+                1 + reply.hidden_replies for reply in root.thread
+            )
+            root.more = {'cursor': cursors[root.path], 'count': count}
+    return shown
+
+
+def _comment_limit(request, default):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        limit = default
+    return min(max(limit, 1), settings.MAX_COMMENTS)
+
+
+def comments_page(request, post_id, per_page):
+    """Страница веток по `?order=` и `?cursor=` с видимыми ответами."""
+    order = request.GET.get('order')
+    if order not in Comment.ORDERINGS:
+        order = 'oldest'
+    paginator = CursorPaginator(
+        _thread_queryset(post_id).filter(depth=0),
+        per_page,
+        Comment.ORDERINGS[order],
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    shown = _attach_replies(post_id, page.object_list)
+    reactions.mark_reacted(request.user, shown)
+    return page, order
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    print()
+    post = get_object_or_404(
+        Post.objects.for_feed().with_last_comment(), id=post_id
+    )
+    reactions.mark_reacted(request.user, [post])
+    etag = page_etag(
+        request,
+        post_state(post),
+        post.last_comment and post.last_comment.timestamp(),
+        author_state(post.author),
+        request.GET.get('order'),
+        reactions.version(post.id),
+    )
+
+    def context():
+        # Комментарии нужны, только если страницу придётся рендерить.
+        comments, order = comments_page(
+            request, post.id, settings.NUM_COMMENTS
+        )
+        return {
+            'form': CommentForm(),
+            'post': post,
+            'comments': comments,
+            'order': order,
+        }
+
+    return render_conditional(
+        request, 'posts/post_detail.html', context, etag
+    )
+
+
+def post_comments(request, post_id):
+    """Порция веток для «Показать ещё» или свёрнутые ответы `?thread=`."""
+    if 'thread' in request.GET:
+        return comment_thread(request, post_id)
+    comments, order = comments_page(
+        request, post_id, _comment_limit(request, settings.NUM_COMMENTS)
+    )
+    if not comments.object_list:
+        get_object_or_404(Post.objects.only('id'), id=post_id)
     context = {
-        'form': CommentForm(),
-        'post': post,
+        'post_id': post_id,
+        'comments': comments,
+        'order': order,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def comment_thread(request, post_id):
+    try:
+        comment_id = int(request.GET['thread'])
+    except ValueError:
+        raise Http404('Некорректная ветка')
+    comment = get_object_or_404(
+        Comment.objects.only('id', 'path', 'depth', 'replies'),
+        id=comment_id, post_id=post_id,
+    )
+    _attach_replies(
+        post_id,
+        [comment],
+        _comment_limit(request, settings.MAX_COMMENTS),
+        request.GET.get('cursor'),
+    )
+    reactions.mark_reacted(request.user, comment.thread)
+    context = {
+        'post_id': post_id,
+        'parent': comment,
+        'thread': comment.thread,
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render(request, 'posts/includes/thread.html', context)
 
 
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    form = CommentForm(request.POST or None)
+    form = ReplyForm(request.POST or None, post=post)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+    return redirect('posts:post_detail', post_id)
+
+
+@login_required
+def react(request, post_id, comment_id=None):
+    """Поставить, сменить или снять (`kind` пуст) реакцию."""
+    if comment_id is None:
+        target = get_object_or_404(Post.objects.only('id'), id=post_id)
+    else:
+        target = get_object_or_404(
+            Comment.objects.only('id', 'post_id'),
+            id=comment_id, post_id=post_id,
+        )
+    kind = request.POST.get('kind')
+    if request.method == 'POST' and kind in reactions.KINDS:
+        reactions.react(request.user, target, kind)
+    elif request.method == 'POST' and kind == '':
+        reactions.unreact(request.user, target)
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(
+        next_url, {request.get_host()}, request.is_secure()
+    ):
+        return redirect(next_url)
     return redirect('posts:post_detail', post_id)
 
 
@@ -91,7 +346,8 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -120,7 +376,8 @@ def post_edit(request, post_id):
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    with transaction.atomic():
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username)
 
 
@@ -128,8 +385,9 @@ def profile_unfollow(request, username):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author,
-        )
+        with transaction.atomic():
+            Follow.objects.get_or_create(
+                user=request.user,
+                author=author,
+            )
     return redirect('posts:profile', username)
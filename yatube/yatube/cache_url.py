@@ -0,0 +1,44 @@
+"""Описание кэша строкой, как DATABASE_URL: `схема://адрес?параметры`.
+
+    locmem://                    свой кэш у каждого процесса (по умолчанию)
+    file:///var/tmp/yatube       общий кэш процессов одной машины
+    db://yatube_cache            общая таблица в основной БД
+    memcached://host:11211,host2:11211
+    redis://host:6379/1          нужен пакет django-redis
+    dummy://                     без кэширования
+
+Параметры `timeout` и `key_prefix` передаются в настройки кэша.
+"""
+from urllib.parse import parse_qs, urlsplit
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'redis': 'django_redis.cache.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def parse_cache_url(url):
+    parts = urlsplit(url)
+    if parts.scheme not in BACKENDS:
+        raise ValueError(f'Неизвестная схема кэша: {url}')
+    config = {'BACKEND': BACKENDS[parts.scheme]}
+    if parts.scheme == 'file':
+        config['LOCATION'] = parts.path
+    elif parts.scheme == 'db':
+        config['LOCATION'] = parts.netloc or parts.path.strip('/')
+    elif parts.scheme == 'memcached':
+        config['LOCATION'] = parts.netloc.split(',')
+    elif parts.scheme == 'redis':
+        config['LOCATION'] = parts._replace(query='').geturl()
+    elif parts.netloc:
+        config['LOCATION'] = parts.netloc
+    params = parse_qs(parts.query)
+    if 'timeout' in params:
+        config['TIMEOUT'] = int(params['timeout'][0])
+    if 'key_prefix' in params:
+        config['KEY_PREFIX'] = params['key_prefix'][0]
+    return config
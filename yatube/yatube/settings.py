@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from .cache_url import parse_cache_url
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -40,6 +42,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -57,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -145,14 +149,98 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 NUM_POSTS = 10
 
+# Комментарии на странице поста и наибольшая порция «Показать ещё».
+NUM_COMMENTS = 20
+
+MAX_COMMENTS = 100
+
+# Сколько уровней ответов показывать под веткой; глубже — свёрнуто.
+COMMENT_DEPTH = 3
+
+# Как часто, в секундах, процесс пишет накопленные счётчики реакций.
+REACTION_FLUSH_INTERVAL = 5
+
+# Наибольший ?limit= в списках JSON API.
+API_MAX_PAGE_SIZE = 100
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кэш задаётся переменной окружения, см. yatube/cache_url.py.
+# Для нескольких воркеров gunicorn нужен общий бэкенд, например
+# YATUBE_CACHE_URL=redis://localhost:6379/1 или file:///var/tmp/yatube.
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': parse_cache_url(os.getenv('YATUBE_CACHE_URL', 'locmem://')),
 }
+
+# Сессии, KV-хранилище sorl-thumbnail и кэш шаблонов ходят в общий кэш.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+
+THUMBNAIL_CACHE = 'default'
+
+# Авторы, у которых подписчиков больше этого числа, не раскладываются
+# по лентам при публикации: их посты подмешиваются при чтении.
+FEED_FANOUT_LIMIT = 1000
+
+# Сколько последних постов автора добавляется в ленту при подписке.
+FEED_BACKFILL_SIZE = 200
+
+# Лента «Популярное»: за столько часов свежесть даёт посту столько же
+# очков, сколько десятикратный рост вовлечённости.
+POPULAR_DECAY_HOURS = 12
+
+# Посты автора не старше стольких дней переоцениваются при подписке
+# и отписке.
+POPULAR_RESCORE_DAYS = 7
+
+# Сколько авторов «кого почитать» хранится и показывается пользователю.
+SUGGESTION_COUNT = 5
+
+# Сколько читателей авторов пользователя, не больше, просматривается
+# при пересчёте его рекомендаций по подписке.
+SUGGESTION_REFRESH_READERS = 1000
+
+# Профилирование запросов: Server-Timing, лог `yatube.profiling`
+# и страница /debug/profiling/ для персонала.
+PROFILING_ENABLED = False
+
+PROFILING_BUFFER_SIZE = 100
+
+# Отрендеренные карточки постов; ключ версионируется полем Post.updated.
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+# Страницы лент для анонимов; сбрасываются по тегам при изменении постов,
+# таймаут страхует от изменений в обход сигналов.
+PAGE_CACHE_TIMEOUT = 10 * 60
+
+# Варианты картинок постов, которые заранее готовит
+# `manage.py process_thumbnails`: кадр с пропорциями POST_IMAGE_RATIO
+# в каждой ширине и каждом формате, который умеет сохранять Pillow.
+# Последний формат отдаётся браузерам без поддержки остальных.
+POST_IMAGE_RATIO = (960, 339)
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+POST_IMAGE_QUALITY = 80
+
+# Ограничения загружаемых картинок: больше POST_IMAGE_MAX_BYTES и
+# POST_IMAGE_MAX_PIXELS не принимаются, больше POST_IMAGE_MAX_SIZE
+# уменьшаются при загрузке.
+POST_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIZE = (2560, 2560)
+
+THUMBNAIL_WORKERS = 4
+
+THUMBNAIL_JOB_ATTEMPTS = 3
+
+# Через сколько секунд задачу упавшего воркера можно взять повторно.
+THUMBNAIL_JOB_TIMEOUT = 10 * 60
+
+# Версия кода в ETag страниц: после выкладки новых шаблонов клиенты не
+# должны получать 304 на старые страницы.
+RELEASE = os.getenv('YATUBE_RELEASE', '')
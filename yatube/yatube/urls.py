@@ -23,6 +23,8 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('api/v1/', include('api.urls', namespace='api')),
+    path('debug/', include('core.urls', namespace='core')),
     path('', include('posts.urls'), name='posts'),
 ]
 